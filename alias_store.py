@@ -0,0 +1,199 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+import cache
+from name_matcher import normalize_name
+
+# --- Configuration ---
+ALIAS_DB_PATH = os.environ.get("COLLEGE_ALIAS_DB", os.path.join(cache.CACHE_DIR, "aliases.sqlite3"))
+
+
+class AliasStore:
+    """
+    A persistent dictionary of college name aliases, e.g. "UPenn" -> "University of Pennsylvania".
+
+    Mappings live in a small SQLite table and are loaded into in-memory hash indexes when
+    the store is opened, so lookups never touch the database. Aliases are grouped by their
+    canonical name, so any spelling in a group can be used to find the others.
+    """
+
+    def __init__(self, db_path=ALIAS_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._canonical_by_key = {}
+        self._names_by_canonical_key = {}
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS aliases (
+                alias_key TEXT PRIMARY KEY,
+                alias TEXT NOT NULL,
+                canonical TEXT NOT NULL,
+                source TEXT,
+                updated_at REAL
+            )
+            """
+        )
+        self._connection.commit()
+        for alias, canonical in self._connection.execute("SELECT alias, canonical FROM aliases"):
+            self._index(alias, canonical)
+
+    def __len__(self):
+        return len(self._canonical_by_key)
+
+    def _index(self, alias, canonical):
+        alias_key = normalize_name(alias)
+        previous_canonical = self._canonical_by_key.get(alias_key)
+        if previous_canonical is not None:
+            self._names_by_canonical_key.get(normalize_name(previous_canonical), set()).discard(alias)
+        self._canonical_by_key[alias_key] = canonical
+        names = self._names_by_canonical_key.setdefault(normalize_name(canonical), set())
+        names.update((alias, canonical))
+
+    def lookup(self, name):
+        """Returns the canonical name recorded for name, or None."""
+        return self._canonical_by_key.get(normalize_name(name))
+
+    def equivalents(self, name):
+        """
+        Returns every known spelling of the same college as name, canonical name first.
+
+        Returns:
+            list: The canonical name followed by its aliases, or an empty list if
+                  name is not in the store.
+        """
+        canonical = self.lookup(name)
+        if canonical is None:
+            canonical = name
+            if normalize_name(canonical) not in self._names_by_canonical_key:
+                return []
+        aliases = self._names_by_canonical_key.get(normalize_name(canonical), set())
+        return [canonical] + sorted(alias for alias in aliases if alias != canonical)
+
+    def add_many(self, mappings, source="manual"):
+        """
+        Records alias -> canonical mappings, replacing earlier mappings for the same alias.
+
+        Args:
+            mappings (dict or iterable of pairs): Alias to canonical name mappings.
+            source (str): Where the mappings came from, e.g. "llm", "import" or "manual".
+
+        Returns:
+            int: The number of mappings recorded.
+        """
+        if isinstance(mappings, dict):
+            mappings = mappings.items()
+        now = time.time()
+        rows = []
+        for alias, canonical in mappings:
+            alias, canonical = str(alias).strip(), str(canonical).strip()
+            if alias and canonical and normalize_name(alias) != normalize_name(canonical):
+                rows.append((normalize_name(alias), alias, canonical, source, now))
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO aliases (alias_key, alias, canonical, source, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._connection.commit()
+            for _, alias, canonical, _, _ in rows:
+                self._index(alias, canonical)
+        return len(rows)
+
+    def add(self, alias, canonical, source="manual"):
+        """Records a single alias -> canonical mapping."""
+        return self.add_many([(alias, canonical)], source=source)
+
+    def export_aliases(self, path):
+        """
+        Writes every mapping to a .json or .csv file.
+
+        Returns:
+            int: The number of mappings written.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT alias, canonical, source FROM aliases ORDER BY canonical, alias"
+            ).fetchall()
+        records = [{"alias": alias, "canonical": canonical, "source": source} for alias, canonical, source in rows]
+
+        if path.lower().endswith(".csv"):
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=["alias", "canonical", "source"])
+                writer.writeheader()
+                writer.writerows(records)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"aliases": records}, f, indent=2, ensure_ascii=False)
+        return len(records)
+
+    def import_aliases(self, path):
+        """
+        Loads mappings from a .json or .csv file produced by export_aliases.
+
+        JSON files may also be a plain {"alias": "canonical", ...} object.
+
+        Returns:
+            int: The number of mappings recorded.
+        """
+        if path.lower().endswith(".csv"):
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                mappings = [(row["alias"], row["canonical"]) for row in csv.DictReader(f)]
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if "aliases" in data:
+                mappings = [(record["alias"], record["canonical"]) for record in data["aliases"]]
+            else:
+                mappings = list(data.items())
+        return self.add_many(mappings, source="import")
+
+    def close(self):
+        self._connection.close()
+
+
+# --- Shared store ---
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_alias_store():
+    """Returns the shared AliasStore, opening (and indexing) it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AliasStore()
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the persistent college alias dictionary.")
+    parser.add_argument("--db", default=ALIAS_DB_PATH, help="Path to the alias database.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("export", help="Export aliases to a .json or .csv file.").add_argument("path")
+    subparsers.add_parser("import", help="Import aliases from a .json or .csv file.").add_argument("path")
+    subparsers.add_parser("stats", help="Print how many aliases are stored.")
+    args = parser.parse_args()
+
+    store = AliasStore(args.db)
+    if args.command == "export":
+        print(f"Exported {store.export_aliases(args.path)} aliases to '{args.path}'.")
+    elif args.command == "import":
+        print(f"Imported {store.import_aliases(args.path)} aliases from '{args.path}'.")
+    else:
+        print(f"{len(store)} aliases stored in '{args.db}'.")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
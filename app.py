@@ -1,7 +1,31 @@
 import streamlit as st
 import os
-import tempfile # To handle temporary file creation for uploaded files
-from orchestrator import workflow # Assuming your backend script is named orchestrator.py
+import time
+from cache import ResultCache, content_hash, file_content_hash
+from jobs import JobQueue, QUEUED, RUNNING, DONE # Workflows run in background worker processes
+from orchestrator import WORKFLOW_STAGES
+
+# Seconds between status checks while a job is running
+POLL_INTERVAL_SECONDS = 1.0
+
+
+@st.cache_resource
+def get_job_queue():
+    # One queue (and worker pool) shared by every session on this server
+    return JobQueue()
+
+
+def get_result_cache():
+    # Finished results for this session, so identical uploads and settings are not reprocessed
+    if "result_cache" not in st.session_state:
+        st.session_state["result_cache"] = ResultCache()
+    return st.session_state["result_cache"]
+
+
+def result_cache_key(excel_bytes, pdf_bytes, column, start_row, sheets=None):
+    # The output file name is left out on purpose: renaming the download needs no new run
+    return content_hash(file_content_hash(excel_bytes), file_content_hash(pdf_bytes), column.upper(), str(start_row),
+                        sheets or "")
 
 # --- Page Configuration (Optional but Recommended) ---
 st.set_page_config(
@@ -35,68 +59,110 @@ if output_filename and not output_filename.endswith(".xlsx"):
 else:
     output_filename_with_ext = output_filename if output_filename else "processed_colleges.xlsx"
 
+column_letter = st.text_input("Spreadsheet column(s) holding the college list, e.g. A or A,C:", "A").strip() or "A"
+start_row = int(st.number_input("Read the college list starting after row:", min_value=0, value=3, step=1))
+sheets = st.text_input("Sheets to process (\"all\", or titles separated by commas; blank for the active sheet):", "").strip() or None
+
+show_stage_timings = st.checkbox("Show stage timings after processing", value=False)
+
 
 # --- Processing Logic (Main Page) ---
 st.header("🚀 3. Process and Download")
 
+job_queue = get_job_queue()
+result_cache = get_result_cache()
+# Use the filename potentially corrected with .xlsx extension
+final_output_filename = os.path.basename(output_filename_with_ext)
+
 if uploaded_excel_file is not None and uploaded_pdf_file is not None:
+    excel_bytes = uploaded_excel_file.getvalue()
+    pdf_bytes = uploaded_pdf_file.getvalue()
+    current_key = result_cache_key(excel_bytes, pdf_bytes, column_letter, start_row, sheets)
+    # --- A result or job for other uploads or settings doesn't belong to what's on the page now ---
+    if st.session_state.get("result_key") != current_key:
+        st.session_state.pop("result_key", None)
+        st.session_state.pop("job_id", None)
+
     if st.button("Process Files", type="primary", use_container_width=True):
-        with st.spinner("Processing... please wait. This may take a few moments."):
-            try:
-                # Create temporary files to store uploaded data, as the backend expects file paths
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_excel:
-                    tmp_excel.write(uploaded_excel_file.getvalue())
-                    input_excel_path = tmp_excel.name
-
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_pdf:
-                    tmp_pdf.write(uploaded_pdf_file.getvalue())
-                    input_pdf_path = tmp_pdf.name
-
-                # Define a temporary path for the output file
-                output_dir = tempfile.mkdtemp()
-                # Use the filename potentially corrected with .xlsx extension
-                final_output_filename = os.path.basename(output_filename_with_ext)
-                output_excel_path = os.path.join(output_dir, final_output_filename)
-
-
-                st.info(f"Excel input: {uploaded_excel_file.name}")
-                st.info(f"PDF input: {uploaded_pdf_file.name}")
-                st.info(f"Output will be: {final_output_filename}")
-                st.info("Processing started...")
-
-                # --- Call your backend workflow ---
-                workflow(
-                    input_excel_path=input_excel_path,
-                    input_pdf_path=input_pdf_path,
-                    output_excel_path=output_excel_path
+        st.session_state["result_key"] = current_key
+        st.session_state.pop("job_id", None)
+        # --- Only start a new job if this session hasn't already processed these exact inputs ---
+        if result_cache.get(st.session_state["result_key"]) is None:
+            st.session_state["job_id"] = job_queue.submit(
+                excel_bytes=excel_bytes,
+                pdf_bytes=pdf_bytes,
+                output_name=final_output_filename,
+                column=column_letter,
+                start_row=start_row,
+                sheets=sheets
+            )
+
+    result_key = st.session_state.get("result_key")
+    job = job_queue.get(st.session_state["job_id"]) if "job_id" in st.session_state else None
+    result = None
+
+    if job is not None and job["status"] in (QUEUED, RUNNING):
+        if job["status"] == QUEUED:
+            status_text = "Waiting for a free worker..."
+        else:
+            running_stages = [name for name, stage in job["stages"].items() if stage["status"] == RUNNING]
+            status_text = f"Processing: {', '.join(running_stages) or 'starting'}..."
+        st.progress(job["progress"], text=status_text)
+        st.caption(f"Job {job['id'][:8]} · you can keep this page open or come back to it later.")
+        # --- Poll the job table until the background worker finishes ---
+        time.sleep(POLL_INTERVAL_SECONDS)
+        st.rerun()
+
+    elif job is not None and job["status"] != DONE:
+        finished_stages = [name for name in WORKFLOW_STAGES if job["stages"].get(name, {}).get("status") == DONE]
+        st.error("An error occurred while processing your files.")
+        if finished_stages:
+            st.caption(f"Completed stages: {', '.join(finished_stages)}")
+        st.text_area("Error details:", job["error"] or "Unknown error", height=300)
+
+    elif job is not None:
+        result = result_cache.get(result_key)
+        if result is None:
+            output_bytes = job_queue.result(job["id"])
+            if output_bytes is not None:
+                result = {"output": output_bytes, "metrics": job["metrics"]}
+                result_cache.set(result_key, result, size=len(output_bytes))
+        if result is not None:
+            st.success("✅ Workflow completed successfully!")
+        else:
+            st.warning("The output file for this job is no longer available. Please process the files again.")
+
+    elif result_key is not None:
+        result = result_cache.get(result_key)
+        if result is not None:
+            st.success("✅ These files were already processed with the same settings; reusing that result.")
+
+    if result is not None:
+        if show_stage_timings:
+            with st.expander("⏱️ Stage timings", expanded=True):
+                st.dataframe(
+                    [
+                        {
+                            "stage": record["stage"],
+                            "wall (s)": record["wall_seconds"],
+                            "cpu (s)": record["cpu_seconds"],
+                            "RSS growth (MiB)": record["rss_growth_mb"],
+                            "process peak RSS (MiB)": record["process_peak_rss_mb"],
+                            "LLM tokens": record["llm"]["total_tokens"],
+                        }
+                        for record in result["metrics"]
+                    ],
+                    use_container_width=True
                 )
 
-                st.success("✅ Workflow completed successfully!")
-
-                # --- Provide Download Link ---
-                with open(output_excel_path, "rb") as file:
-                    st.download_button(
-                        label=f"⬇️ Download {final_output_filename}",
-                        data=file,
-                        file_name=final_output_filename, # Use the user-defined or default output name
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        use_container_width=True
-                    )
-
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
-                st.error("Please check the console for more detailed error messages if running locally.")
-                import traceback
-                st.text_area("Error Traceback:", traceback.format_exc(), height=300)
-
-            finally:
-                # Clean up temporary files
-                if 'input_excel_path' in locals() and os.path.exists(input_excel_path):
-                    os.remove(input_excel_path)
-                if 'input_pdf_path' in locals() and os.path.exists(input_pdf_path):
-                    os.remove(input_pdf_path)
-                # Output file in temp dir will be cleaned up eventually, or can be explicitly if needed
-                # For Streamlit Cloud, temp dirs are managed.
+        # --- Provide Download Link ---
+        st.download_button(
+            label=f"⬇️ Download {final_output_filename}",
+            data=result["output"],
+            file_name=final_output_filename, # Use the user-defined or default output name
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True
+        )
 
 else:
     st.warning("Please upload both an Excel file and a PDF file above to enable processing.")
@@ -8,32 +8,76 @@ OUTPUT_TXT_FILENAME = "extracted_pdf_content_for_regex.txt"
 FINAL_COLLEGE_LIST_FILENAME = "final_college_list_regex.txt"
 
 
-def regex_college_names(text, save_to_file=False, output_filename="regex_results.txt"):
+# --- Regex for College Names ---
+# Words use possessive quantifiers (Python 3.11+), so a failed line is rejected in linear
+# time instead of re-splitting every word, and [^\S\n] keeps matches on a single line
+# when scanning the full text.
+P_MULTI_NC = r"(?:[A-Z][\w'-]++(?:[^\S\n]++[\w'-]++)+)"
+P_ACRONYM_NC = r"(?:[A-Z]{2,7}+)"
+P_SINGLE_NC = r"(?:[A-Z][\w'-]++)"
+DEFAULT_NAME_PATTERNS = (P_MULTI_NC, P_ACRONYM_NC, P_SINGLE_NC)
+# Trailing " - commentary" after a name, e.g. "MIT - reach school".
+COMMENTARY_PATTERN = r"[^\S\n]++-[^\S\n].*+"
+# Lines that are never college names, e.g. "● bullet point notes".
+EXCLUDED_LINE_PATTERN = r"●[^\S\n]"
+
+
+class CollegeNameExtractor:
+    """
+    A precompiled matcher that finds candidate college names in one finditer pass.
+
+    Each line that consists only of a name (optionally followed by " - commentary")
+    yields that name. Name patterns are tried in order, so more specific ones go first.
+    """
+
+    def __init__(self, name_patterns=DEFAULT_NAME_PATTERNS, commentary_pattern=COMMENTARY_PATTERN,
+                 excluded_line_pattern=EXCLUDED_LINE_PATTERN):
+        college_name_capture_group = "(" + "|".join(name_patterns) + ")"
+        self.pattern = re.compile(
+            rf"^[^\S\n]*+(?!{excluded_line_pattern}){college_name_capture_group}"
+            rf"(?:{commentary_pattern})?[^\S\n]*+$",
+            re.MULTILINE,
+        )
+
+    def iter_names(self, text):
+        """Yields every candidate name in text, in order."""
+        for match in self.pattern.finditer(text):
+            yield match.group(1)
+
+    def extract(self, text):
+        """
+        Returns the set of unique candidate names.
+
+        Args:
+            text (str or iterable of str): The full text, or a stream of pages/lines.
+        """
+        if isinstance(text, str):
+            return set(self.iter_names(text))
+        found_colleges = set()
+        for chunk in text:
+            found_colleges.update(self.iter_names(chunk))
+        return found_colleges
+
+
+DEFAULT_EXTRACTOR = CollegeNameExtractor()
+
+
+def regex_college_names(text, save_to_file=False, output_filename="regex_results.txt", extractor=None):
     """
     Args:
-        text (str): The text to extract college names from.
+        text (str or iterable of str): The text to extract college names from. Either the
+            full text, or a stream of pages/lines (e.g. from pdf_processor.iter_pdf_pages),
+            which is consumed incrementally.
+        extractor (CollegeNameExtractor, optional): A custom pattern set to use instead of
+            DEFAULT_EXTRACTOR.
     Returns:
         str: A string of unique, sorted college names.
     """
-    # --- Regex for College Names ---
-    P_MULTI_NC = r"(?:[A-Z][\w'-]+(?:\s+(?:(?:of|the|and|at|de)|[\w'-]+))+)"
-    P_ACRONYM_NC = r"(?:[A-Z]{2,7})"
-    P_SINGLE_NC = r"(?:[A-Z][\w'-]+)"
-    college_name_capture_group = f"({P_MULTI_NC}|{P_ACRONYM_NC}|{P_SINGLE_NC})"
-    commentary_consumption_part = r"(?:\s*\s-\s.*)?"
-    college_name_regex = rf"^(?!\s*●\s)\s*{college_name_capture_group}\s*{commentary_consumption_part}\s*$"
-    
-    found_colleges = []
-    for line in text.splitlines():
-        stripped_line = line.strip()
-        if not stripped_line:
-            continue
-        match = re.match(college_name_regex, stripped_line)
-        if match:
-            found_colleges.append(match.group(1))
+    # Deduplicate while streaming so repeated names never accumulate in memory.
+    found_colleges = (extractor or DEFAULT_EXTRACTOR).extract(text)
 
     if found_colleges:
-        unique_sorted_colleges = sorted(list(set(found_colleges)))
+        unique_sorted_colleges = sorted(found_colleges)
 
         if save_to_file:
             try:
@@ -0,0 +1,163 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cache
+
+# --- Configuration ---
+DEFAULT_LLM_CONCURRENCY = 8
+MANIFEST_FIELDS = ("excel", "pdf", "output")
+
+
+def load_manifest(manifest_path, column="A", start_row=3, sheets=None):
+    """
+    Loads batch jobs from a CSV or JSON manifest.
+
+    CSV manifests need `excel`, `pdf` and `output` columns. JSON manifests are a list of
+    objects with those keys, optionally wrapped as {"jobs": [...]}. Relative paths are
+    resolved against the manifest's directory.
+
+    column, start_row and sheets are the workflow settings the jobs will run with. They are
+    part of each job_id, so a rerun with other settings doesn't skip jobs done with the old ones.
+
+    Returns:
+        list: One dict per job with `job_id`, `excel`, `pdf` and `output` keys.
+    """
+    if manifest_path.lower().endswith(".json"):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows.get("jobs", [])
+    else:
+        with open(manifest_path, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+
+    settings = json.dumps({"column": str(column).upper(), "start_row": start_row, "sheets": sheets})
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    for line_number, row in enumerate(rows, start=1):
+        missing = [field for field in MANIFEST_FIELDS if not row.get(field)]
+        if missing:
+            raise ValueError(f"Manifest entry {line_number} is missing {', '.join(missing)}.")
+        job = {field: os.path.normpath(os.path.join(base_dir, row[field].strip())) for field in MANIFEST_FIELDS}
+        job["job_id"] = cache.content_hash(job["excel"], job["pdf"], job["output"], settings)[:16]
+        jobs.append(job)
+    return jobs
+
+
+def load_completed_job_ids(report_path):
+    """Returns the ids of jobs the report marks as done whose output file still exists."""
+    completed = set()
+    if not os.path.exists(report_path):
+        return completed
+    with open(report_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue # A partially written line from a crash
+            # Later records win, so a job that failed after succeeding is run again.
+            if record.get("status") == "ok" and os.path.exists(record.get("output", "")):
+                completed.add(record["job_id"])
+            else:
+                completed.discard(record.get("job_id"))
+    return completed
+
+
+def _init_worker(llm_limiter):
+    import llm
+    llm.set_request_limiter(llm_limiter)
+
+
+def run_job(job, column, start_row, sheets=None):
+    """Runs workflow for one manifest entry in a worker process and returns its report record."""
+    from orchestrator import workflow
+
+    record = dict(job, started_at=time.time(), pid=os.getpid())
+    started = time.perf_counter()
+    try:
+        output_dir = os.path.dirname(job["output"])
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        success = workflow(job["excel"], job["pdf"], job["output"], column=column, start_row=start_row, sheets=sheets)
+        record["status"] = "ok" if success else "failed"
+        if not success:
+            record["error"] = "workflow did not write the output workbook"
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["traceback"] = traceback.format_exc()
+    record["duration_seconds"] = round(time.perf_counter() - started, 3)
+    record["finished_at"] = time.time()
+    return record
+
+
+def run_batch(manifest_path, report_path=None, max_workers=None, llm_concurrency=DEFAULT_LLM_CONCURRENCY,
+              column="A", start_row=3, sheets=None):
+    """
+    Runs workflow for every job in a manifest across a process pool.
+
+    Each finished job is appended to a JSON-lines report as soon as it completes, and jobs
+    already reported as successful are skipped, so an interrupted batch resumes where it
+    stopped. All workers share one cap on in-flight LLM requests.
+
+    Returns:
+        list: The report records of the jobs run by this call.
+    """
+    report_path = report_path or f"{os.path.splitext(manifest_path)[0]}.report.jsonl"
+    jobs = load_manifest(manifest_path, column, start_row, sheets)
+    completed = load_completed_job_ids(report_path)
+    pending = [job for job in jobs if job["job_id"] not in completed]
+    print(f"{len(jobs)} jobs in manifest, {len(jobs) - len(pending)} already done, {len(pending)} to run.")
+    if not pending:
+        return []
+
+    records = []
+    batch_started = time.perf_counter()
+    with multiprocessing.Manager() as manager:
+        llm_limiter = manager.BoundedSemaphore(llm_concurrency)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(llm_limiter,)) as executor, \
+                open(report_path, "a", encoding="utf-8") as report_file:
+            futures = {executor.submit(run_job, job, column, start_row, sheets): job for job in pending}
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e: # e.g. a worker process died
+                    record = dict(futures[future], status="failed", error=f"{type(e).__name__}: {e}")
+                records.append(record)
+                report_file.write(json.dumps(record) + "\n")
+                report_file.flush()
+                print(f"[{len(records)}/{len(pending)}] {record['status']:6s} "
+                      f"{record.get('duration_seconds', 0):8.1f}s  {record['output']}")
+
+    failed = [record for record in records if record["status"] != "ok"]
+    print(f"Batch finished in {time.perf_counter() - batch_started:.1f}s: "
+          f"{len(records) - len(failed)} succeeded, {len(failed)} failed. Report: '{report_path}'")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process many student PDF/spreadsheet pairs from a manifest.")
+    parser.add_argument("manifest", help="CSV or JSON manifest with excel, pdf and output entries.")
+    parser.add_argument("--report", help="JSON-lines status report (default: <manifest>.report.jsonl).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--llm-concurrency", type=int, default=DEFAULT_LLM_CONCURRENCY,
+                        help="Maximum LLM requests in flight across all workers.")
+    parser.add_argument("--column", default="A", help="Ground-truth column letter, or several separated by commas.")
+    parser.add_argument("--start-row", type=int, default=3, help="Row after which ground-truth names start.")
+    parser.add_argument("--sheets", help="'all', or comma-separated sheet titles to process (default: the active sheet).")
+    args = parser.parse_args()
+
+    records = run_batch(args.manifest, args.report, args.workers, args.llm_concurrency, args.column, args.start_row,
+                        args.sheets)
+    if any(record["status"] != "ok" for record in records):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
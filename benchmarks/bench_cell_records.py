@@ -0,0 +1,83 @@
+"""
+Compares the memory and time cost of capturing cell records in highlight.extract_excel_data,
+before (one dict with copied styles per cell) and after (slotted CellRecords sharing
+interned styles).
+
+Usage:
+    python benchmarks/bench_cell_records.py [--rows 10000] [--columns 12]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from copy import copy
+
+import openpyxl
+from openpyxl.styles import Font, PatternFill
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import highlight
+
+
+def legacy_create_cell_data_object(cell):
+    """The per-cell dict representation highlight.py used before CellRecord."""
+    return {
+        "value": cell.value,
+        "fill": copy(cell.fill) if cell.has_style and cell.fill else PatternFill(fill_type=None),
+        "font": copy(cell.font) if cell.has_style and cell.font else Font(),
+        "hyperlink": copy(cell.hyperlink) if cell.hyperlink else None,
+    }
+
+
+def build_sheet(num_rows, num_columns):
+    """Builds an in-memory sheet where a third of the cells carry one of a few styles."""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    fills = [PatternFill("solid", start_color=color) for color in ("FFFF00", "CCCCFF", "03FDFD")]
+    fonts = [Font(bold=True), Font(italic=True)]
+    for row in range(1, num_rows + 1):
+        for column in range(1, num_columns + 1):
+            cell = sheet.cell(row=row, column=column, value=f"r{row}c{column}")
+            if (row + column) % 3 == 0:
+                cell.fill = fills[row % len(fills)]
+                cell.font = fonts[column % len(fonts)]
+        if row % 10 == 0:
+            sheet.cell(row=row, column=num_columns).hyperlink = f"https://example.com/{row}"
+    return sheet
+
+
+def measure(sheet, make_record):
+    """Returns (seconds, peak bytes) for capturing a record of every cell in the sheet."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    records = [[make_record(cell) for cell in row] for row in sheet.iter_rows()]
+    elapsed = time.perf_counter() - started
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return elapsed, peak_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--columns", type=int, default=12)
+    args = parser.parse_args()
+
+    sheet = build_sheet(args.rows, args.columns)
+    style_interner = highlight.StyleInterner()
+    candidates = {
+        "before (dict + copies)": legacy_create_cell_data_object,
+        "after (CellRecord + interning)": lambda cell: highlight.create_cell_data_object(cell, style_interner),
+    }
+
+    per_10k = 10000 / args.rows
+    print(f"{args.rows} rows x {args.columns} columns")
+    for label, make_record in candidates.items():
+        elapsed, peak_bytes = measure(sheet, make_record)
+        print(f"{label:32s} {elapsed * per_10k:8.3f} s / 10k rows   {peak_bytes * per_10k / 2**20:8.1f} MiB / 10k rows")
+
+
+if __name__ == "__main__":
+    main()
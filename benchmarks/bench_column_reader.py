@@ -0,0 +1,73 @@
+"""
+Compares reading the ground-truth column from an .xlsx file with pandas (the previous
+pd.read_excel(usecols=[col_idx]) path) and with utils.iter_column_values, which streams the
+column through openpyxl's read-only mode.
+
+Usage:
+    python benchmarks/bench_column_reader.py [--rows 20000] [--columns 12] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+import synthetic
+import utils
+
+
+def legacy_read_column(xlsx_bytes, col_idx, row_to_start_after):
+    """The pd.read_excel path extract_column_data_as_string used before iter_column_values."""
+    import io
+    import pandas as pd
+    df = pd.read_excel(io.BytesIO(xlsx_bytes), usecols=[col_idx], header=None, engine="openpyxl")
+    return [str(item) for item in df.iloc[row_to_start_after:, 0].tolist()]
+
+
+def streaming_read_column(xlsx_bytes, col_idx, row_to_start_after):
+    return list(utils.iter_column_values(xlsx_bytes, "A", row_to_start_after))
+
+
+def measure(read_column, xlsx_bytes, repeat):
+    """Returns (best seconds, peak traced bytes) of reading column A past the header rows."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        values = read_column(xlsx_bytes, 0, synthetic.HEADER_ROWS)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    read_column(xlsx_bytes, 0, synthetic.HEADER_ROWS)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak_bytes, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--columns", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    xlsx_bytes = synthetic.make_spreadsheet(synthetic.college_names(args.rows), args.columns)
+    # Import pandas up front so the comparison isn't about import time.
+    import pandas # noqa: F401
+
+    print(f"{args.rows} rows x {args.columns} columns ({len(xlsx_bytes) / 2**20:.1f} MiB)")
+    results = {}
+    for label, read_column in (("before (pd.read_excel)", legacy_read_column),
+                               ("after (read-only stream)", streaming_read_column)):
+        seconds, peak_bytes, results[label] = measure(read_column, xlsx_bytes, args.repeat)
+        print(f"{label:26s} {seconds * 1e3:9.1f} ms   peak {peak_bytes / 2**20:7.1f} MiB")
+
+    before, after = results.values()
+    if before != after:
+        print("WARNING: the two readers return different values.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Startup budget check: measures how long importing an entry-point module takes with
+`python -X importtime`, and fails if it goes over budget or pulls in a heavy dependency
+that should only load once the stage needing it runs.
+
+Each measurement is a fresh interpreter, so nothing is already imported or cached in memory;
+the best of --repeat runs is reported to keep disk-cache noise out.
+
+Usage:
+    python benchmarks/bench_import_time.py [--module orchestrator] [--budget-ms 150] [--repeat 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Dependencies that take hundreds of milliseconds to import and must stay lazy.
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "pdfplumber", "google.genai")
+
+
+def import_times(module):
+    """
+    Imports module in a fresh interpreter under -X importtime.
+
+    Returns:
+        list: (self microseconds, cumulative microseconds, depth, module name) per imported module.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="Module to import (repeatable; default: orchestrator).")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="Maximum import time per module.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="How many of the slowest imports to list.")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.module or ["orchestrator"]:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        totals = [
+            next(cumulative for _, cumulative, depth, name in entries if depth == 0 and name == module)
+            for entries in runs
+        ]
+        best = min(range(len(runs)), key=lambda index: totals[index])
+        entries = runs[best]
+        total_ms = totals[best] / 1000
+
+        print(f"import {module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        print("  slowest imports (self time):")
+        for self_us, cumulative_us, _, name in sorted(entries, reverse=True)[:args.top]:
+            print(f"    {self_us / 1000:8.1f} ms  {name}")
+
+        imported = {name for _, _, _, name in entries}
+        heavy_imported = [heavy for heavy in HEAVY_MODULES if heavy in imported]
+        if heavy_imported:
+            print(f"  FAIL: importing {module} loads {', '.join(heavy_imported)}; import them where they are used.")
+            failed = True
+        if total_ms > args.budget_ms:
+            print(f"  FAIL: over the startup budget by {total_ms - args.budget_ms:.1f} ms.")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Micro-benchmark for highlight's read-merge-sort stage: the previous list of dicts of
+CellRecords with a per-row membership check and a Python sort, versus the columnar
+CollegeTable with style ids, vectorized membership and a NumPy argsort.
+
+Everything between loading the input sheet and writing the output sheet is timed.
+
+Usage:
+    python benchmarks/bench_merge_sort.py [--rows 50000] [--columns 12] [--json-names 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import highlight
+
+
+def synthetic_names(num_rows, seed=0):
+    rng = random.Random(seed)
+    words = ["University", "College", "State", "Institute", "Technology", "Saint", "North", "South"]
+    return [f"{rng.choice(words)} of {rng.choice(words)} {rng.randrange(num_rows * 10)}" for _ in range(num_rows)]
+
+
+def build_sheet(names, num_columns):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for _ in range(highlight.HEADER_ROWS):
+        sheet.append([f"header {column}" for column in range(num_columns)])
+    for name in names:
+        sheet.append([name] + [f"c{column}" for column in range(1, num_columns)])
+    return sheet
+
+
+def legacy_merge_sort(sheet, json_colleges_set, college_name_col_idx):
+    """The dict-per-row extract_excel_data, combine_and_prepare_data and sort used before CollegeTable."""
+    style_interner = highlight.StyleInterner()
+    num_columns = sheet.max_column
+    existing_rows = []
+    existing_names = set()
+    for row_idx in range(highlight.HEADER_ROWS + 1, sheet.max_row + 1):
+        name = sheet.cell(row=row_idx, column=college_name_col_idx).value
+        if name and isinstance(name, str) and name.strip():
+            existing_names.add(name.strip())
+            existing_rows.append({
+                "name": name.strip(),
+                "cell_objects": [
+                    highlight.create_cell_data_object(sheet.cell(row=row_idx, column=column), style_interner)
+                    for column in range(1, num_columns + 1)
+                ],
+                "is_new": False,
+            })
+    all_processed_data = []
+    for college in existing_rows:
+        all_processed_data.append({
+            "name": college["name"],
+            "cell_objects": college["cell_objects"],
+            "is_in_json": college["name"] in json_colleges_set,
+            "is_new": False,
+        })
+    for json_college_name in json_colleges_set:
+        if json_college_name not in existing_names:
+            all_processed_data.append({
+                "name": json_college_name,
+                "cell_objects": [
+                    highlight.CellRecord(json_college_name if i + 1 == college_name_col_idx else None,
+                                         highlight.DEFAULT_FILL, highlight.NEW_ROW_FONT)
+                    for i in range(num_columns)
+                ],
+                "is_in_json": True,
+                "is_new": True,
+            })
+    return sorted(all_processed_data, key=lambda x: (x["name"] is None, str(x["name"]).lower()))
+
+
+def columnar_merge_sort(sheet, json_colleges_set, college_name_col_idx, teal_fill):
+    college_table, _, _ = highlight.extract_excel_data(
+        sheet, highlight.HEADER_ROWS + 1, college_name_col_idx, highlight.HEADER_ROWS
+    )
+    combined = highlight.combine_and_prepare_data(college_table, json_colleges_set, college_name_col_idx, teal_fill)
+    return highlight.sort_by_name(combined)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--columns", type=int, default=12)
+    parser.add_argument("--json-names", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    names = synthetic_names(args.rows)
+    rng = random.Random(1)
+    # Half of the JSON names are already in the sheet, half are new rows.
+    json_colleges_set = set(rng.sample(names, args.json_names // 2)) | set(synthetic_names(args.json_names // 2, seed=2))
+    college_name_col_idx = highlight.COLLEGE_NAME_COLUMN_IDX
+    teal_fill = highlight.make_teal_fill()
+
+    sheet = build_sheet(names, args.columns)
+
+    candidates = {
+        "before (dicts + sorted)": lambda: legacy_merge_sort(sheet, json_colleges_set, college_name_col_idx),
+        "after (CollegeTable)": lambda: columnar_merge_sort(sheet, json_colleges_set, college_name_col_idx, teal_fill),
+    }
+    print(f"{args.rows} rows x {args.columns} columns, {len(json_colleges_set)} JSON names")
+    results = {}
+    for label, run in candidates.items():
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            results[label] = run()
+            timings.append(time.perf_counter() - started)
+        print(f"{label:26s} {min(timings) * 1e3:9.1f} ms")
+
+    legacy_order = [row["name"] for row in results["before (dicts + sorted)"]]
+    columnar_order = results["after (CollegeTable)"].names.tolist()
+    if sorted(legacy_order) != sorted(columnar_order) or \
+            [name.lower() for name in legacy_order] != [name.lower() for name in columnar_order]:
+        print("WARNING: the two implementations produce different rows.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares highlighting a workbook with one tab per student the old way, one run per tab
+(each loading the workbook and reading its ground-truth names again), with a single
+process_college_data_to_new_sheet call over every tab, which loads the workbook once
+and finds the JSON names in all tabs through one NameIndex.
+
+Usage:
+    python benchmarks/bench_multi_sheet.py [--sheets 10] [--rows 1000] [--columns 8] [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+import openpyxl
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+import highlight
+import synthetic
+from name_index import NameIndex, select_sheets
+from workbook_loader import load_workbook
+
+
+def per_sheet_runs(xlsx_bytes, json_names):
+    """One run per tab, as before: load, index that tab's names, highlight it."""
+    outputs = []
+    for sheet_title in load_workbook(xlsx_bytes).sheetnames:
+        workbook = load_workbook(xlsx_bytes)
+        name_index = NameIndex.build(workbook, [sheet_title], "A", synthetic.HEADER_ROWS)
+        output = io.BytesIO()
+        highlight.process_college_data_to_new_sheet(workbook, json_names, output, name_index=name_index)
+        outputs.append(output.getvalue())
+    return outputs
+
+
+def single_run(xlsx_bytes, json_names):
+    """One load and one NameIndex over every tab."""
+    workbook = load_workbook(xlsx_bytes)
+    name_index = NameIndex.build(workbook, "all", "A", synthetic.HEADER_ROWS)
+    output = io.BytesIO()
+    highlight.process_college_data_to_new_sheet(workbook, json_names, output, name_index=name_index)
+    return [output.getvalue()]
+
+
+def sheet_contents(xlsx_outputs):
+    """Returns the values and fill colors of every output sheet, in order."""
+    contents = []
+    for xlsx_bytes in xlsx_outputs:
+        for sheet in select_sheets(openpyxl.load_workbook(io.BytesIO(xlsx_bytes)), "all"):
+            contents.append([
+                (cell.value, cell.fill.fgColor.rgb if cell.fill.fill_type else None, cell.font.b)
+                for row in sheet.iter_rows() for cell in row
+            ])
+    return contents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sheets", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    names = synthetic.college_names(args.rows + 20)
+    xlsx_bytes = synthetic.make_spreadsheet(names[:args.rows], args.columns, num_sheets=args.sheets)
+    json_names = json.dumps({"colleges": names[:args.rows:7] + names[args.rows:]})
+    print(f"{args.sheets} sheets x {args.rows} rows x {args.columns} columns ({len(xlsx_bytes) / 2**20:.1f} MiB)")
+
+    results = {}
+    for label, run in (("before (one run per sheet)", per_sheet_runs), ("after (one NameIndex)", single_run)):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[label] = run(xlsx_bytes, json_names)
+            timings.append(time.perf_counter() - started)
+        print(f"{label:28s} {min(timings) * 1e3:9.1f} ms")
+
+    before, after = (sheet_contents(outputs) for outputs in results.values())
+    if before != after:
+        print("WARNING: the two approaches produced different sheets.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Micro-benchmark for college name candidate extraction: the previous line-by-line
+re.match loop versus the precompiled single-pass CollegeNameExtractor.
+
+The synthetic catalog mixes college names, names with " - commentary", bullet notes,
+prose, and long lines that almost match, which are the worst case for backtracking.
+
+Usage:
+    python benchmarks/bench_regex.py [--lines 10000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import apply_regex
+
+WORDS = ["University", "College", "of", "the", "and", "State", "Institute", "Technology", "at", "de", "Saint"]
+PLACES = ["Boston", "Chicago", "Texas", "Michigan", "Oregon", "Vermont", "Denver", "Austin", "Miami", "Tulane"]
+
+
+def legacy_regex_college_names(text):
+    """The per-line regex_college_names loop used before CollegeNameExtractor."""
+    P_MULTI_NC = r"(?:[A-Z][\w'-]+(?:\s+(?:(?:of|the|and|at|de)|[\w'-]+))+)"
+    P_ACRONYM_NC = r"(?:[A-Z]{2,7})"
+    P_SINGLE_NC = r"(?:[A-Z][\w'-]+)"
+    college_name_capture_group = f"({P_MULTI_NC}|{P_ACRONYM_NC}|{P_SINGLE_NC})"
+    commentary_consumption_part = r"(?:\s*\s-\s.*)?"
+    college_name_regex = rf"^(?!\s*●\s)\s*{college_name_capture_group}\s*{commentary_consumption_part}\s*$"
+
+    found_colleges = set()
+    for line in text.splitlines():
+        stripped_line = line.strip()
+        if not stripped_line:
+            continue
+        match = re.match(college_name_regex, stripped_line)
+        if match:
+            found_colleges.add(match.group(1))
+    return found_colleges
+
+
+def synthetic_catalog(num_lines, seed=0):
+    """Returns a deterministic catalog text with num_lines lines."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(num_lines):
+        kind = rng.random()
+        place = rng.choice(PLACES)
+        if kind < 0.35:
+            lines.append(f"University of {place}")
+        elif kind < 0.5:
+            lines.append(f"{place} State University - strong program, apply early")
+        elif kind < 0.6:
+            lines.append("".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(2, 6))))
+        elif kind < 0.75:
+            lines.append(f"● Notes about {place}: visit in the fall.")
+        elif kind < 0.9:
+            lines.append("")
+        else:
+            # A run of words ending in punctuation: matches almost to the end, then fails.
+            # The legacy pattern's cost roughly doubles with every "of"/"the"/"and" in it.
+            words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 12)))
+            lines.append(f"{place} {words} of the {place}, more notes")
+    return "\n".join(lines)
+
+
+def best_time(function, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(text)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = synthetic_catalog(args.lines)
+    legacy_seconds, legacy_result = best_time(legacy_regex_college_names, text, args.repeat)
+    extractor_seconds, extractor_result = best_time(apply_regex.DEFAULT_EXTRACTOR.extract, text, args.repeat)
+
+    print(f"{args.lines} lines, {len(extractor_result)} unique candidates")
+    print(f"legacy per-line re.match  {legacy_seconds * 1e6 / args.lines:8.2f} us/line   {legacy_seconds * 1e3:8.1f} ms total")
+    print(f"CollegeNameExtractor      {extractor_seconds * 1e6 / args.lines:8.2f} us/line   {extractor_seconds * 1e3:8.1f} ms total")
+    if legacy_result != extractor_result:
+        print("WARNING: the two extractors disagree on this catalog.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
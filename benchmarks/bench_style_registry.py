@@ -0,0 +1,108 @@
+"""
+Compares writing highlight's output sheet by assigning a Font, a PatternFill and a copied
+Hyperlink to every cell (the previous writer) with the OutputStyles registry, which adds each
+distinct fill/font combination to the workbook once and copies its StyleArray onto cells.
+
+Both the in-memory and the write-only writers are timed, including output_workbook.save.
+
+Usage:
+    python benchmarks/bench_style_registry.py [--rows 20000] [--columns 12]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+from copy import copy
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+import highlight
+import synthetic
+
+
+def legacy_write(workbook, college_table, write_only):
+    """The per-cell style and hyperlink assignment used before OutputStyles."""
+    styles = college_table.styles
+    sheet = workbook.create_sheet(title=highlight.NEW_SHEET_NAME)
+    for row_index, (values, fill_ids, font_ids, hyperlink_ids) in enumerate(
+            highlight._iter_table_rows(college_table), start=highlight.HEADER_ROWS + 1):
+        row_cells = []
+        for column_index, value in enumerate(values, start=1):
+            cell = WriteOnlyCell(sheet, value=value) if write_only else sheet.cell(row=row_index, column=column_index)
+            cell.value = value
+            cell.font = styles.fonts[font_ids[column_index - 1]]
+            cell.fill = styles.fills[fill_ids[column_index - 1]]
+            hyperlink = styles.hyperlinks[hyperlink_ids[column_index - 1]]
+            if hyperlink:
+                cell.hyperlink = copy(hyperlink)
+            row_cells.append(cell)
+        if write_only:
+            sheet.append(row_cells)
+
+
+def registry_write(workbook, college_table, write_only):
+    if write_only:
+        highlight.write_data_to_streaming_sheet(workbook, highlight.NEW_SHEET_NAME, [], college_table)
+    else:
+        highlight.write_data_to_new_sheet(workbook, highlight.NEW_SHEET_NAME, [], college_table, highlight.HEADER_ROWS)
+
+
+def workbook_parts(xlsx_bytes):
+    """Returns the package's parts, except docProps/core.xml, which holds the save time."""
+    with zipfile.ZipFile(io.BytesIO(xlsx_bytes)) as package:
+        return {name: package.read(name) for name in package.namelist() if name != "docProps/core.xml"}
+
+
+def measure(write, college_table, write_only):
+    """Returns (write seconds, save seconds, output bytes)."""
+    workbook = openpyxl.Workbook(write_only=write_only)
+    if not write_only:
+        # Start both writers from a workbook without the default sheet, as in highlight.
+        workbook.remove(workbook.active)
+    started = time.perf_counter()
+    write(workbook, college_table, write_only)
+    written = time.perf_counter()
+    output = io.BytesIO()
+    workbook.save(output)
+    return written - started, time.perf_counter() - written, output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--columns", type=int, default=12)
+    args = parser.parse_args()
+
+    names = synthetic.college_names(args.rows)
+    xlsx_bytes = synthetic.make_spreadsheet(names, args.columns, hyperlink_fraction=0.3)
+    sheet = openpyxl.load_workbook(io.BytesIO(xlsx_bytes)).active
+    college_table, _, _ = highlight.extract_excel_data(
+        sheet, highlight.HEADER_ROWS + 1, highlight.COLLEGE_NAME_COLUMN_IDX, highlight.HEADER_ROWS
+    )
+    json_names = set(names[::3]) | {"New College of Somewhere"}
+    college_table = highlight.sort_by_name(highlight.combine_and_prepare_data(
+        college_table, json_names, highlight.COLLEGE_NAME_COLUMN_IDX, highlight.make_teal_fill()
+    ))
+    print(f"{len(college_table)} rows x {args.columns} columns, {len(college_table.styles.fills)} fills, "
+          f"{len(college_table.styles.fonts)} fonts, {len(college_table.styles.hyperlinks) - 1} distinct hyperlinks")
+
+    for write_only in (False, True):
+        outputs = []
+        for label, write in (("before (per-cell styles)", legacy_write), ("after (OutputStyles)", registry_write)):
+            write_seconds, save_seconds, output = measure(write, college_table, write_only)
+            outputs.append(output)
+            mode = "write-only" if write_only else "in-memory"
+            print(f"{mode:10s} {label:26s} write {write_seconds * 1e3:8.1f} ms   save {save_seconds * 1e3:8.1f} ms   "
+                  f"{len(output) / 1024:8.1f} KiB")
+        if workbook_parts(outputs[0]) != workbook_parts(outputs[1]):
+            print("WARNING: the two writers produced different workbooks.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+End-to-end benchmark of orchestrator.workflow on synthetic inputs (see synthetic.py), with
+every LLM call answered by a local FakeGeminiClient instead of the Gemini API.
+
+Each run happens in a fresh process with empty caches, and records the RunMetrics of every
+stage (wall and CPU time, RSS growth, sizes, LLM tokens). The results are saved as JSON, and
+--compare prints the per-stage change against an earlier results file, so regressions show
+up between versions.
+
+Usage:
+    python benchmarks/bench_workflow.py [--pages 20] [--rows 500] [--llm-latency 0.2] [--repeat 3]
+                                        [--output results.json] [--compare previous.json]
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+# Slowdowns smaller than this are timer noise, however large they are relatively.
+MIN_REGRESSION_SECONDS = 0.01
+# Stages opened with instrumentation.stage() inside a workflow stage; they are only recorded
+# if the active RunMetrics reaches the StageGraph's worker threads.
+NESTED_STAGES = ("excel_save",)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+import synthetic
+
+
+def run_once(xlsx_bytes, pdf_bytes, llm_options, verbose):
+    """Runs one workflow in this (fresh) process and returns its timings and stage records."""
+    # Point every cache at an empty directory before the modules that read it are imported.
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["COLLEGE_CACHE_DIR"] = cache_dir
+        os.environ["COLLEGE_ALIAS_DB"] = os.path.join(cache_dir, "aliases.sqlite3")
+        # Dependencies a stage imports lazily are counted in that stage's time instead.
+        import_started = time.perf_counter()
+        import instrumentation
+        import llm
+        import orchestrator
+        import_seconds = time.perf_counter() - import_started
+
+        client = synthetic.FakeGeminiClient(**llm_options)
+        llm.set_client(client)
+        metrics = instrumentation.RunMetrics(metrics_path=None, echo=False)
+        log = io.StringIO()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stdout if verbose else log):
+            output = orchestrator.workflow(xlsx_bytes, pdf_bytes, None, metrics=metrics, profile=None)
+        total_seconds = time.perf_counter() - started
+    return {
+        "success": output is not None,
+        "total_seconds": round(total_seconds, 4),
+        "import_seconds": round(import_seconds, 4),
+        "peak_rss_mb": instrumentation.peak_rss_mb(),
+        "llm_requests": client.requests,
+        "output_bytes": len(output.getvalue()) if output is not None else None,
+        "stages": metrics.records,
+    }
+
+
+def summarize(runs):
+    """
+    Returns {stage: {"wall_seconds", "cpu_seconds" (medians), "rss_growth_mb" (max)}}, plus "import"
+    and "total" entries; "total" has the run's process peak RSS as "peak_rss_mb" (max).
+    """
+    by_stage = {}
+    for run in runs:
+        for record in run["stages"]:
+            by_stage.setdefault(record["stage"], []).append(record)
+    summary = {
+        stage: {
+            "wall_seconds": round(statistics.median(record["wall_seconds"] for record in records), 4),
+            "cpu_seconds": round(statistics.median(record["cpu_seconds"] for record in records), 4),
+            "rss_growth_mb": max((record["rss_growth_mb"] or 0) for record in records),
+        }
+        for stage, records in by_stage.items()
+    }
+    summary["import"] = {
+        "wall_seconds": round(statistics.median(run["import_seconds"] for run in runs), 4),
+    }
+    summary["total"] = {
+        "wall_seconds": round(statistics.median(run["total_seconds"] for run in runs), 4),
+        "peak_rss_mb": max((run["peak_rss_mb"] or 0) for run in runs),
+    }
+    return summary
+
+
+def git_revision():
+    """Returns the checked-out commit (with "-dirty" for local changes), or None outside a git checkout."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def compare(summary, previous_summary, threshold):
+    """Prints the change in median wall time per stage and returns the stages slower by more than threshold."""
+    regressions = []
+    print(f"\n{'stage':24s} {'before (s)':>11s} {'after (s)':>11s} {'change':>9s}")
+    for stage, stats in summary.items():
+        before = previous_summary.get(stage, {}).get("wall_seconds")
+        after = stats["wall_seconds"]
+        if not before:
+            print(f"{stage:24s} {'-':>11s} {after:11.4f} {'new':>9s}")
+            continue
+        change = (after - before) / before
+        flag = ""
+        if change > threshold and after - before > MIN_REGRESSION_SECONDS:
+            flag = "  REGRESSION"
+            regressions.append(stage)
+        print(f"{stage:24s} {before:11.4f} {after:11.4f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--lines-per-page", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--columns", type=int, default=6)
+    parser.add_argument("--styled", type=float, default=0.3, help="Share of styled spreadsheet cells.")
+    parser.add_argument("--hyperlinks", type=float, default=0.1, help="Share of spreadsheet rows with a hyperlink.")
+    parser.add_argument("--overlap", type=float, default=0.5,
+                        help="Share of catalog colleges that are already in the spreadsheet.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds before each fake LLM reply.")
+    parser.add_argument("--llm-chunk-latency", type=float, default=0.0,
+                        help="Seconds between the pieces of a streamed fake LLM reply.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Where to save the results (default: benchmarks/results/workflow-<commit>.json).")
+    parser.add_argument("--compare", help="An earlier results file to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown of a stage that counts as a regression in --compare.")
+    parser.add_argument("--verbose", action="store_true", help="Show the workflow's own output.")
+    args = parser.parse_args()
+
+    xlsx_bytes, pdf_bytes = synthetic.make_inputs(args.pages, args.lines_per_page, args.rows, args.columns,
+                                                  args.styled, args.hyperlinks, args.overlap, args.seed)
+    llm_options = {"latency_seconds": args.llm_latency, "chunk_latency_seconds": args.llm_chunk_latency}
+    print(f"Inputs: {args.pages} PDF pages ({len(pdf_bytes) / 1024:.0f} KiB), {args.rows} x {args.columns} "
+          f"spreadsheet ({len(xlsx_bytes) / 1024:.0f} KiB); fake LLM latency {args.llm_latency}s")
+
+    runs = []
+    # A fresh process per run, so module imports, caches and peak RSS don't carry over.
+    context = multiprocessing.get_context("spawn")
+    for run_index in range(args.repeat):
+        with context.Pool(1) as pool:
+            run = pool.apply(run_once, (xlsx_bytes, pdf_bytes, llm_options, args.verbose))
+        runs.append(run)
+        status = "ok" if run["success"] else "FAILED"
+        print(f"run {run_index + 1}/{args.repeat}: {run['total_seconds']:.3f} s "
+              f"(+ {run['import_seconds']:.3f} s importing), "
+              f"peak RSS {run['peak_rss_mb']} MiB, {run['llm_requests']} LLM requests, {status}")
+
+    summary = summarize(runs)
+    print(f"\n{'stage':24s} {'wall (s)':>9s} {'cpu (s)':>9s} {'RSS growth (MiB)':>17s} {'peak RSS (MiB)':>15s}")
+    for stage, stats in summary.items():
+        cpu_seconds = f"{stats['cpu_seconds']:9.4f}" if "cpu_seconds" in stats else f"{'-':>9s}"
+        rss_growth_mb = f"{stats['rss_growth_mb']:17.1f}" if "rss_growth_mb" in stats else f"{'-':>17s}"
+        peak_rss_mb = f"{stats['peak_rss_mb']:15.1f}" if "peak_rss_mb" in stats else f"{'-':>15s}"
+        print(f"{stage:24s} {stats['wall_seconds']:9.4f} {cpu_seconds} {rss_growth_mb} {peak_rss_mb}")
+
+    revision = git_revision()
+    results = {
+        "benchmark": "workflow",
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "inputs": {"pdf_bytes": len(pdf_bytes), "xlsx_bytes": len(xlsx_bytes)},
+        "summary": summary,
+        "runs": runs,
+    }
+    output_path = args.output or os.path.join(RESULTS_DIR, f"workflow-{revision or 'unknown'}.json")
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\nResults saved to '{output_path}'.")
+
+    exit_code = 0 if all(run["success"] for run in runs) else 1
+    missing_stages = [stage for stage in NESTED_STAGES if stage not in summary]
+    if missing_stages:
+        print(f"WARNING: no metrics were recorded for the nested stage(s): {', '.join(missing_stages)}.")
+        exit_code = 1
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous.get("config", {}).get("rows") != args.rows or previous.get("config", {}).get("pages") != args.pages:
+            print("Warning: the previous results were measured on inputs of a different size.")
+        print(f"Compared with {previous.get('git_revision')} ({previous.get('created_at')}):")
+        if compare(summary, previous["summary"], args.threshold):
+            exit_code = 1
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Deterministic synthetic inputs for the benchmarks: college-list PDFs and interview spreadsheets
+of configurable size, plus a fake Gemini client that answers locally with configurable latency.
+
+The same seed always produces the same PDF, the same spreadsheet contents and the same LLM
+replies, so benchmark runs on different versions of the code process exactly the same work.
+
+Usage:
+    python benchmarks/synthetic.py --pdf catalog.pdf --pages 20 --xlsx list.xlsx --rows 500
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import random
+import time
+import zlib
+
+import openpyxl
+from openpyxl.styles import Font, PatternFill
+
+PLACES = [
+    "Boston", "Chicago", "Texas", "Michigan", "Oregon", "Vermont", "Denver", "Austin", "Miami", "Tulane",
+    "Princeton", "Columbia", "Georgetown", "Rochester", "Dartmouth", "Wisconsin", "Virginia", "Arizona",
+    "Florida", "Kentucky", "Nevada", "Utah", "Maine", "Ohio", "Iowa", "Kansas", "Delaware", "Vanderbilt",
+    "Emory", "Baylor",
+]
+NAME_PATTERNS = [
+    "University of {place}", "{place} State University", "{place} College", "{place} Institute of Technology",
+    "{place} University", "College of {place}",
+]
+COMMENTARY = ["reach school", "good fit", "safety", "visited in March", "strong engineering", "needs essay"]
+PROSE = [
+    "Notes from our last meeting are summarized below.",
+    "Remember to request transcripts before the deadline.",
+    "these are the schools we discussed during the session",
+    "Financial aid forms are due in early February for most programs.",
+]
+FILL_COLORS = ["FFFF00", "CCCCFF", "FFCC99", "C6EFCE", "F4CCCC"]
+HEADER_ROWS = 3
+
+
+def college_names(count, seed=0):
+    """Returns count distinct, realistic-looking college names in a deterministic order."""
+    names = [pattern.format(place=place) for place in PLACES for pattern in NAME_PATTERNS]
+    campus = 2
+    while len(names) < count:
+        names.extend(f"{pattern.format(place=place)} at {PLACES[campus % len(PLACES)]}"
+                     for place in PLACES for pattern in NAME_PATTERNS)
+        campus += 1
+    random.Random(seed).shuffle(names)
+    return names[:count]
+
+
+def catalog_lines(num_pages, lines_per_page, names, seed=0):
+    """
+    Returns the text lines of each page of a synthetic college catalog.
+
+    Lines mix bare college names, names with " - commentary", bullet notes and prose,
+    which are the cases the regex and filter stages have to tell apart.
+    """
+    rng = random.Random(seed)
+    pages = []
+    for _ in range(num_pages):
+        lines = []
+        for _ in range(lines_per_page):
+            roll = rng.random()
+            name = rng.choice(names)
+            if roll < 0.45:
+                lines.append(name)
+            elif roll < 0.7:
+                lines.append(f"{name} - {rng.choice(COMMENTARY)}")
+            elif roll < 0.85:
+                lines.append(f"• {rng.choice(COMMENTARY)} for {name}")
+            else:
+                lines.append(rng.choice(PROSE))
+        pages.append(lines)
+    return pages
+
+
+def _pdf_string(text):
+    encoded = text.encode("cp1252", errors="replace")
+    return b"(" + encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def make_pdf(pages, path=None):
+    """
+    Writes a minimal text PDF with one page per list of lines.
+
+    Args:
+        pages (list): A list of pages, each a list of text lines (see catalog_lines).
+        path (str, optional): Where to save the PDF.
+
+    Returns:
+        bytes: The PDF.
+    """
+    objects = []
+    # Object 1 is the font and object 2 the page tree; each page adds a content stream and a page.
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    objects.append(None)
+    page_ids = []
+    for lines in pages:
+        stream = b"BT /F1 10 Tf 12 TL 40 800 Td " + b" ".join(_pdf_string(line) + b" Tj T*" for line in lines) + b" ET"
+        stream = zlib.compress(stream)
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /CropBox [0 0 612 842] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 1 0 R >> >> >>" % len(objects))
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % page_id for page_id in page_ids) + \
+        b"] /Count %d >>" % len(page_ids)
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for object_id, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % object_id + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, len(objects), xref_offset)
+
+    pdf_bytes = bytes(output)
+    if path:
+        with open(path, "wb") as f:
+            f.write(pdf_bytes)
+    return pdf_bytes
+
+
+def _fill_student_sheet(sheet, names, num_columns, styled_fraction, hyperlink_fraction, rng, fills, fonts):
+    """Writes one student's header rows and college rows (see make_spreadsheet)."""
+    sheet["A1"] = "2025 Interview Spreadsheet"
+    sheet["A1"].font = Font(bold=True, size=14)
+    sheet["A2"] = "Student: Synthetic"
+    for column in range(1, num_columns + 1):
+        header = sheet.cell(row=HEADER_ROWS, column=column, value="College" if column == 1 else f"Notes {column - 1}")
+        header.fill = fills[0]
+        header.font = fonts[0]
+
+    for row, name in enumerate(names, start=HEADER_ROWS + 1):
+        sheet.cell(row=row, column=1, value=name)
+        for column in range(2, num_columns + 1):
+            sheet.cell(row=row, column=column, value=f"{rng.choice(COMMENTARY)} ({row}, {column})")
+        for column in range(1, num_columns + 1):
+            if rng.random() < styled_fraction:
+                cell = sheet.cell(row=row, column=column)
+                cell.fill = rng.choice(fills)
+                cell.font = rng.choice(fonts)
+        if num_columns > 1 and rng.random() < hyperlink_fraction:
+            sheet.cell(row=row, column=num_columns).hyperlink = f"https://example.edu/{row}"
+
+
+def make_spreadsheet(names, num_columns=6, styled_fraction=0.3, hyperlink_fraction=0.1, path=None, seed=0,
+                     num_sheets=1):
+    """
+    Writes an interview spreadsheet: HEADER_ROWS header rows, then one college per row in column A.
+
+    Args:
+        names (list): College names for column A.
+        num_columns (int): Total columns per row; the extra ones hold notes.
+        styled_fraction (float): Share of cells given one of a few fills and fonts.
+        hyperlink_fraction (float): Share of rows whose last cell links to a web page.
+        path (str, optional): Where to save the workbook.
+        num_sheets (int): With more than one, the workbook gets a tab per student
+                          ("Student 1", "Student 2", ...), each listing names in its own order.
+
+    Returns:
+        bytes: The .xlsx file.
+    """
+    rng = random.Random(seed)
+    fills = [PatternFill("solid", start_color=color) for color in FILL_COLORS]
+    fonts = [Font(bold=True), Font(italic=True), Font(color="1F4E79")]
+
+    workbook = openpyxl.Workbook()
+    for sheet_number in range(1, num_sheets + 1):
+        sheet = workbook.active if sheet_number == 1 else workbook.create_sheet()
+        sheet.title = "Student" if num_sheets == 1 else f"Student {sheet_number}"
+        sheet_names = names if sheet_number == 1 else rng.sample(names, len(names))
+        _fill_student_sheet(sheet, sheet_names, num_columns, styled_fraction, hyperlink_fraction, rng, fills, fonts)
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    xlsx_bytes = buffer.getvalue()
+    if path:
+        with open(path, "wb") as f:
+            f.write(xlsx_bytes)
+    return xlsx_bytes
+
+
+def make_inputs(pages=20, lines_per_page=40, rows=500, columns=6, styled_fraction=0.3, hyperlink_fraction=0.1,
+                overlap=0.5, seed=0):
+    """
+    Returns (xlsx_bytes, pdf_bytes) for one benchmark case.
+
+    The catalog mentions about `overlap` of its names from the spreadsheet and the rest from
+    colleges that aren't in it, so both the highlight and the new-row paths get exercised.
+    """
+    pool = college_names(rows + max(rows, 50), seed=seed)
+    listed, unlisted = pool[:rows], pool[rows:]
+    rng = random.Random(seed + 1)
+    catalog_size = max(1, min(len(pool), pages * lines_per_page // 4))
+    from_list = rng.sample(listed, min(len(listed), round(catalog_size * overlap)))
+    from_elsewhere = rng.sample(unlisted, min(len(unlisted), catalog_size - len(from_list)))
+    catalog_names = from_list + from_elsewhere or pool[:1]
+    xlsx_bytes = make_spreadsheet(listed, columns, styled_fraction, hyperlink_fraction, seed=seed)
+    pdf_bytes = make_pdf(catalog_lines(pages, lines_per_page, catalog_names, seed=seed))
+    return xlsx_bytes, pdf_bytes
+
+
+# --- Fake LLM ---
+
+class _Usage:
+    def __init__(self, prompt_text, output_text):
+        self.prompt_token_count = math.ceil(len(prompt_text) / 4)
+        self.candidates_token_count = math.ceil(len(output_text) / 4)
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class _Response:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+def _looks_like_college(candidate):
+    return any(word in candidate for word in ("University", "College", "Institute"))
+
+
+def fake_reply(contents, config):
+    """
+    Returns the fake's reply text to a request built by llm._build_request.
+
+    Filter prompts keep the candidates that look like college names; list-processing prompts
+    return the JSON list unchanged with nothing renamed.
+    """
+    user_prompt = contents[0].parts[0].text
+    system_prompt = config.system_instruction[0].text
+    if "<JSON list>" in user_prompt:
+        json_list = user_prompt.split("<JSON list>:", 1)[1].split("</JSON list>", 1)[0]
+        colleges = json.loads(json_list).get("colleges", [])
+        return json.dumps({"colleges": colleges, "renamed": {}})
+    if "filtering out college names" in system_prompt:
+        candidates = [line.strip() for line in user_prompt.splitlines() if line.strip()]
+        return json.dumps({"colleges": [candidate for candidate in candidates if _looks_like_college(candidate)]})
+    return json.dumps({})
+
+
+class FakeGeminiClient:
+    """
+    A drop-in for genai.Client, for llm.set_client, that answers locally and deterministically.
+
+    Args:
+        latency_seconds (float): Delay before each reply (or before the first streamed piece).
+        stream_chunk_chars (int): Size of each piece of a streamed reply.
+        chunk_latency_seconds (float): Delay between streamed pieces.
+    """
+
+    def __init__(self, latency_seconds=0.0, stream_chunk_chars=64, chunk_latency_seconds=0.0):
+        self.latency_seconds = latency_seconds
+        self.stream_chunk_chars = stream_chunk_chars
+        self.chunk_latency_seconds = chunk_latency_seconds
+        self.requests = 0
+        self.models = _FakeModels(self)
+        self.aio = _FakeAio(self)
+
+    def _reply(self, contents, config):
+        self.requests += 1
+        text = fake_reply(contents, config)
+        return text, _Usage(contents[0].parts[0].text, text)
+
+
+class _FakeModels:
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, model, contents, config):
+        time.sleep(self._client.latency_seconds)
+        text, usage = self._client._reply(contents, config)
+        return _Response(text, usage)
+
+
+class _FakeAsyncModels:
+    def __init__(self, client):
+        self._client = client
+
+    async def generate_content(self, model, contents, config):
+        await asyncio.sleep(self._client.latency_seconds)
+        text, usage = self._client._reply(contents, config)
+        return _Response(text, usage)
+
+    async def generate_content_stream(self, model, contents, config):
+        client = self._client
+        text, usage = client._reply(contents, config)
+
+        async def stream():
+            await asyncio.sleep(client.latency_seconds)
+            step = max(1, client.stream_chunk_chars)
+            for start in range(0, len(text), step):
+                if start:
+                    await asyncio.sleep(client.chunk_latency_seconds)
+                # Like the API, only the last piece carries the final usage counts.
+                is_last = start + step >= len(text)
+                yield _Response(text[start:start + step], usage if is_last else None)
+
+        return stream()
+
+
+class _FakeAio:
+    def __init__(self, client):
+        self.models = _FakeAsyncModels(client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="Where to write the synthetic catalog PDF.")
+    parser.add_argument("--xlsx", help="Where to write the synthetic interview spreadsheet.")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--lines-per-page", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--columns", type=int, default=6)
+    parser.add_argument("--styled", type=float, default=0.3, help="Share of styled cells.")
+    parser.add_argument("--hyperlinks", type=float, default=0.1, help="Share of rows with a hyperlink.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    xlsx_bytes, pdf_bytes = make_inputs(args.pages, args.lines_per_page, args.rows, args.columns,
+                                        args.styled, args.hyperlinks, seed=args.seed)
+    for path, data in ((args.xlsx, xlsx_bytes), (args.pdf, pdf_bytes)):
+        if path:
+            with open(path, "wb") as f:
+                f.write(data)
+            print(f"Wrote {len(data) / 1024:.1f} KiB to '{path}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- Configuration ---
+CACHE_DIR = os.environ.get(
+    "COLLEGE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "interview_spreadsheet")
+)
+CACHE_MAX_BYTES = int(os.environ.get("COLLEGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+CACHE_ENABLED = os.environ.get("COLLEGE_CACHE_DISABLED", "") not in ("1", "true", "True")
+# In-memory cache of finished workflow results (see ResultCache).
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("COLLEGE_RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+RESULT_CACHE_TTL_SECONDS = int(os.environ.get("COLLEGE_RESULT_CACHE_TTL_SECONDS", 60 * 60))
+
+
+def content_hash(*parts):
+    """
+    Returns the SHA-256 hex digest of the given parts.
+
+    Each part (str or bytes) is length-prefixed so that ("ab", "c") and ("a", "bc")
+    hash differently.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(str(len(part)).encode("ascii") + b":")
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def file_content_hash(file_source, chunk_size=1024 * 1024):
+    """
+    Returns the SHA-256 hex digest of a file's bytes.
+
+    Args:
+        file_source: A file path (str or os.PathLike), raw bytes, or a seekable file-like
+                     object. File-like objects are rewound to their original position afterwards.
+    """
+    if isinstance(file_source, bytes):
+        return hashlib.sha256(file_source).hexdigest()
+    if isinstance(file_source, os.PathLike):
+        file_source = os.fspath(file_source)
+
+    digest = hashlib.sha256()
+    if isinstance(file_source, str):
+        with open(file_source, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    else:
+        start_position = file_source.tell()
+        file_source.seek(0)
+        for chunk in iter(lambda: file_source.read(chunk_size), b""):
+            digest.update(chunk)
+        file_source.seek(start_position)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    A content-addressed, size-bounded on-disk cache with LRU eviction.
+
+    Each entry is a small JSON file named after its key. Reads refresh the file's
+    modification time, and writes evict the least recently used entries once the
+    cache directory grows past max_bytes.
+    """
+
+    def __init__(self, name, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, enabled=CACHE_ENABLED):
+        self.name = name
+        self.directory = os.path.join(directory, name)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Returns the cached value for key, or None on a miss."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path) # Mark as recently used
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            print(f"Warning: could not read cache entry '{path}': {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self.saved_seconds += entry.get("cost_seconds", 0.0)
+        return entry["value"]
+
+    def set(self, key, value, cost_seconds=0.0):
+        """
+        Stores a JSON-serializable value under key.
+
+        Args:
+            cost_seconds (float): How long computing the value took; credited to
+                                  saved_seconds on every later hit.
+        """
+        if not self.enabled:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"value": value, "cost_seconds": cost_seconds, "created": time.time()}, f)
+            os.replace(tmp_path, path)
+            self._evict()
+        except Exception as e:
+            print(f"Warning: could not write cache entry '{path}': {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _entries(self):
+        """Returns (mtime, size, path) for every entry, oldest first."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for dir_entry in it:
+                    if dir_entry.name.endswith(".json"):
+                        stat = dir_entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+        except FileNotFoundError:
+            return []
+        entries.sort()
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        """Returns hit/miss counters and the current on-disk footprint."""
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+
+class ResultCache:
+    """
+    A small in-memory LRU cache whose entries expire after ttl_seconds.
+
+    Meant for whole workflow results (e.g. output workbooks), so it is bounded by the
+    total size of the stored values rather than by the number of entries.
+    """
+
+    def __init__(self, max_bytes=RESULT_CACHE_MAX_BYTES, ttl_seconds=RESULT_CACHE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict() # key -> (expires_at, size, value), least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        """Returns the cached value for key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, size):
+        """
+        Stores value under key.
+
+        Args:
+            size (int): The value's size in bytes, counted against max_bytes. Values larger
+                        than max_bytes on their own are not stored.
+        """
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.time() + self.ttl_seconds, size, value)
+            self._bytes += size
+            now = time.time()
+            for stale_key in [k for k, (expires_at, _, _) in self._entries.items() if expires_at < now]:
+                self._drop(stale_key)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self):
+        """Returns hit/miss counters and the current in-memory footprint."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+
+# --- Shared cache instances ---
+pdf_text_cache = DiskCache("pdf_text")
+llm_response_cache = DiskCache("llm_responses")
+
+
+def report():
+    """Returns the stats of every shared cache, keyed by cache name."""
+    return {cache.name: cache.stats() for cache in (pdf_text_cache, llm_response_cache)}
@@ -1,43 +1,293 @@
 import json
+import numpy as np
 import openpyxl
+import pandas as pd
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill, Font
+from openpyxl.styles.cell_style import StyleArray
 from openpyxl.worksheet.hyperlink import Hyperlink
 from copy import copy
+from workbook_loader import load_workbook, source_label
+from name_index import NameIndex
+from llm import clean_response_text
+from llm_filter import CollegeStreamParser
+import instrumentation
 
 # --- Helper Functions ---
 
 def load_json_colleges_from_string(json_string):
-    """Loads college names from a JSON string into a set."""
-    try:
-        json_data = json.loads(json_string) # Use json.loads() for string
-        colleges = json_data.get('colleges', [])
-        if not colleges:
-            print("Warning: No colleges found in the provided JSON string or 'colleges' key is missing/empty.")
-        return set(colleges)
-    except json.JSONDecodeError:
+    """
+    Loads college names from a JSON string into a set.
+
+    Accepts {"colleges": [...]} or a bare list, with or without ```json fences. Items that
+    aren't non-empty strings are skipped, and if the string is truncated or malformed the
+    names that can still be read are kept rather than failing the whole run.
+    """
+    colleges, complete = _parse_json_colleges(json_string)
+    if colleges is None:
         print("Error: Could not decode JSON from the provided string.")
         return None
-    except Exception as e: # Catch other potential errors with string input
-        print(f"An unexpected error occurred while processing the JSON string: {e}")
-        return None
+    if not complete:
+        print(f"Warning: the JSON string is truncated or malformed; salvaged {len(colleges)} college names.")
+    colleges = {college.strip() for college in colleges if isinstance(college, str) and college.strip()}
+    if not colleges:
+        print("Warning: No colleges found in the provided JSON string or 'colleges' key is missing/empty.")
+    return colleges
+
+def _parse_json_colleges(json_string):
+    """Returns (colleges, complete), or (None, False) if nothing could be read from json_string."""
+    if not isinstance(json_string, str):
+        return None, False
+    text = clean_response_text(json_string)
+    try:
+        json_data = json.loads(text)
+    except json.JSONDecodeError:
+        parser = CollegeStreamParser()
+        parser.feed(text)
+        return (parser.colleges, False) if parser.colleges else (None, False)
+    if isinstance(json_data, list):
+        return json_data, True
+    if isinstance(json_data, dict) and isinstance(json_data.get('colleges', []), list):
+        return json_data.get('colleges', []), True
+    return None, False
+
+NEW_SHEET_NAME = "Sheet"
+TEAL_COLOR_HEX = "03fdfd"
+HEADER_ROWS = 3
+COLLEGE_NAME_COLUMN_IDX = 1
+
+DEFAULT_FILL = PatternFill(fill_type=None)
+DEFAULT_FONT = Font()
+NEW_ROW_FONT = Font(bold=True)
+
+class CellRecord:
+    """
+    A cell's value, fill, font and hyperlink.
+
+    Style objects are treated as immutable and shared between records, so a record
+    costs four slots rather than a dict plus three copied style objects.
+    """
+    __slots__ = ("value", "fill", "font", "hyperlink")
+
+    def __init__(self, value, fill=DEFAULT_FILL, font=DEFAULT_FONT, hyperlink=None):
+        self.value = value
+        self.fill = fill
+        self.font = font
+        self.hyperlink = hyperlink
+
+class StyleInterner:
+    """
+    Copies each distinct fill and font of a source workbook once and hands out the shared copy.
+
+    openpyxl already stores every distinct style once per workbook and gives each cell
+    an index into those tables, so the index is used as the interning key.
+
+    The interned styles also form a style table (`fills` and `fonts`) that CollegeTable
+    rows refer to by integer id; id 0 is the default fill/font of an unstyled cell.
+    Hyperlinks are interned the same way in `hyperlinks`, where id 0 means no link.
+    """
+    def __init__(self):
+        self._fills = {}
+        self._fonts = {}
+        self.fills = [DEFAULT_FILL]
+        self.fonts = [DEFAULT_FONT]
+        self.hyperlinks = [None]
+        self._fill_ids = {}
+        self._font_ids = {}
+        self._hyperlink_ids = {}
+
+    def fill(self, cell):
+        fill_id = cell._style.fillId
+        fill = self._fills.get(fill_id)
+        if fill is None:
+            fill = self._fills[fill_id] = copy(cell.fill)
+        return fill
+
+    def font(self, cell):
+        font_id = cell._style.fontId
+        font = self._fonts.get(font_id)
+        if font is None:
+            font = self._fonts[font_id] = copy(cell.font)
+        return font
+
+    def add_fill(self, fill):
+        """Adds a fill to the style table (once per object) and returns its id."""
+        key = ("object", id(fill))
+        if key not in self._fill_ids:
+            self._fill_ids[key] = len(self.fills)
+            self.fills.append(fill)
+        return self._fill_ids[key]
+
+    def add_font(self, font):
+        """Adds a font to the style table (once per object) and returns its id."""
+        key = ("object", id(font))
+        if key not in self._font_ids:
+            self._font_ids[key] = len(self.fonts)
+            self.fonts.append(font)
+        return self._font_ids[key]
+
+    def fill_id(self, cell):
+        """Returns the style-table id of the fill to write for cell; cells without a fill pattern get 0."""
+        if not cell.has_style:
+            return 0
+        key = cell._style.fillId
+        fill_id = self._fill_ids.get(key)
+        if fill_id is None:
+            fill = self.fill(cell)
+            fill_id = self._fill_ids[key] = self.add_fill(fill) if fill.fill_type else 0
+        return fill_id
+
+    def font_id(self, cell):
+        """Returns the style-table id of cell's font."""
+        if not cell.has_style:
+            return 0
+        key = cell._style.fontId
+        font_id = self._font_ids.get(key)
+        if font_id is None:
+            font_id = self._font_ids[key] = self.add_font(self.font(cell))
+        return font_id
+
+    def hyperlink_id(self, cell):
+        """Returns the id of cell's hyperlink in `hyperlinks`, or 0 if it has none."""
+        hyperlink = cell.hyperlink
+        if hyperlink is None:
+            return 0
+        key = (hyperlink.target, hyperlink.location, hyperlink.tooltip, hyperlink.display)
+        hyperlink_id = self._hyperlink_ids.get(key)
+        if hyperlink_id is None:
+            hyperlink_id = self._hyperlink_ids[key] = len(self.hyperlinks)
+            self.hyperlinks.append(copy(hyperlink))
+        return hyperlink_id
+
+class OutputStyles:
+    """
+    Registry of the distinct fill/font combinations written to one output workbook.
+
+    Assigning a Font or PatternFill to a cell hashes it and looks it up in the workbook's
+    style tables every time. Here each (fill id, font id) combination from a StyleInterner
+    is added to the workbook once, and cells get a copy of its StyleArray instead, so the
+    cost grows with the number of distinct styles rather than the number of cells.
+    """
+    def __init__(self, workbook, styles):
+        self.workbook = workbook
+        self.styles = styles
+        self._style_arrays = {}
+
+    def style_array(self, fill_id, font_id):
+        """Returns the StyleArray for a combination, adding its fill and font to the workbook on first use."""
+        key = (fill_id, font_id)
+        style_array = self._style_arrays.get(key)
+        if style_array is None:
+            style_array = self._style_arrays[key] = StyleArray()
+            style_array.fillId = self.workbook._fills.add(self.styles.fills[fill_id])
+            style_array.fontId = self.workbook._fonts.add(self.styles.fonts[font_id])
+        return style_array
+
+    def apply(self, cell, fill_id, font_id, hyperlink_id):
+        """Styles a new cell of the workbook and gives it its own copy of the interned hyperlink."""
+        # Each cell needs its own StyleArray and Hyperlink: openpyxl updates both in place.
+        cell._style = copy(self.style_array(fill_id, font_id))
+        if hyperlink_id:
+            cell.hyperlink = copy(self.styles.hyperlinks[hyperlink_id])
+
+class CollegeTable:
+    """
+    Column-oriented data rows of a college sheet.
+
+    Every attribute is one NumPy array over all rows: names, in_json, is_new and source_rows
+    have shape (rows,), and values, fill_ids, font_ids and hyperlink_ids have shape (rows, columns).
+    Styles and hyperlinks are ids into `styles`, a StyleInterner, so merging, flagging and
+    sorting rows are array operations rather than per-row Python work. source_rows holds the
+    row each entry was read from in the source sheet (0 for rows added from the JSON list).
+    """
+    def __init__(self, styles, names, values, fill_ids, font_ids, hyperlink_ids, in_json=None, is_new=None,
+                 source_rows=None):
+        self.styles = styles
+        self.names = names
+        self.values = values
+        self.fill_ids = fill_ids
+        self.font_ids = font_ids
+        self.hyperlink_ids = hyperlink_ids
+        self.in_json = np.zeros(len(names), dtype=bool) if in_json is None else in_json
+        self.is_new = np.zeros(len(names), dtype=bool) if is_new is None else is_new
+        self.source_rows = np.zeros(len(names), dtype=np.int64) if source_rows is None else source_rows
+
+    @classmethod
+    def from_rows(cls, styles, names, values, fill_ids, font_ids, hyperlink_ids, num_columns, source_rows=None):
+        """Builds a table from per-row lists (each row a list of num_columns entries)."""
+        shape = (len(names), num_columns)
+        return cls(
+            styles,
+            _object_array(names, (len(names),)),
+            _object_array(values, shape),
+            np.array(fill_ids, dtype=np.int32).reshape(shape),
+            np.array(font_ids, dtype=np.int32).reshape(shape),
+            np.array(hyperlink_ids, dtype=np.int32).reshape(shape),
+            source_rows=None if source_rows is None else np.array(source_rows, dtype=np.int64),
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def take(self, rows):
+        """Returns a new table with the given rows (an index array or boolean mask), in that order."""
+        return CollegeTable(
+            self.styles, self.names[rows], self.values[rows], self.fill_ids[rows], self.font_ids[rows],
+            self.hyperlink_ids[rows], self.in_json[rows], self.is_new[rows], self.source_rows[rows],
+        )
 
-def create_cell_data_object(cell):
-    """Creates a dictionary to store cell value, fill, font, and hyperlink."""
-    return {
-        "value": cell.value,
-        "fill": copy(cell.fill) if cell.has_style and cell.fill else PatternFill(fill_type=None),
-        "font": copy(cell.font) if cell.has_style and cell.font else Font(),
-        "hyperlink": copy(cell.hyperlink) if cell.hyperlink else None,
-    }
+    def concat(self, other):
+        """Returns a new table with other's rows after this table's rows (both must share styles)."""
+        return CollegeTable(
+            self.styles,
+            *(np.concatenate([getattr(self, name), getattr(other, name)]) for name in
+              ("names", "values", "fill_ids", "font_ids", "hyperlink_ids", "in_json", "is_new", "source_rows")),
+        )
+
+def _object_array(rows, shape):
+    """Builds an object array of the given shape without NumPy trying to unpack the entries."""
+    array = np.empty(shape, dtype=object)
+    if len(rows):
+        array[...] = rows
+    return array
+
+def make_teal_fill():
+    """Returns the fill used to highlight college names that appear in the JSON list."""
+    return PatternFill(start_color=TEAL_COLOR_HEX, end_color=TEAL_COLOR_HEX, fill_type="solid")
+
+
+def create_cell_data_object(cell, style_interner):
+    """Creates a CellRecord storing the cell's value, fill, font, and hyperlink."""
+    if not cell.has_style:
+        return CellRecord(cell.value, hyperlink=copy(cell.hyperlink) if cell.hyperlink else None)
+    return CellRecord(
+        cell.value,
+        style_interner.fill(cell),
+        style_interner.font(cell),
+        copy(cell.hyperlink) if cell.hyperlink else None,
+    )
+
+def _name_col_offsets(college_name_col_idx):
+    """Returns the 0-based offsets of one 1-based name column index or a list of them."""
+    if isinstance(college_name_col_idx, int):
+        return [college_name_col_idx - 1]
+    return [col_idx - 1 for col_idx in college_name_col_idx]
 
 def extract_excel_data(sheet, start_row, college_name_col_idx, num_header_rows):
     """
     Extracts college data and headers from the Excel sheet,
     including cell values, fills, fonts, and hyperlinks.
+
+    college_name_col_idx is the 1-based column holding college names, or a list of such
+    columns; a row is kept if any of them holds a name, and the first one it has becomes
+    the row's name.
+
+    Returns:
+        tuple: (CollegeTable of the rows that have a college name, header rows as lists of
+               CellRecords, number of columns)
     """
-    existing_colleges_data = []
-    existing_excel_college_names = set()
     header_cells_data = []
+    style_interner = StyleInterner()
 
     num_columns = sheet.max_column
     if num_columns == 0 and sheet.max_row > 0:
@@ -47,67 +297,105 @@ def extract_excel_data(sheet, start_row, college_name_col_idx, num_header_rows):
         current_header_row = []
         for j in range(1, num_columns + 1):
             cell = sheet.cell(row=i, column=j)
-            current_header_row.append(create_cell_data_object(cell))
+            current_header_row.append(create_cell_data_object(cell, style_interner))
         header_cells_data.append(current_header_row)
 
-    for current_row_num in range(start_row, sheet.max_row + 1):
-        college_name_cell_obj = sheet.cell(row=current_row_num, column=college_name_col_idx)
-        college_name_cell_value = college_name_cell_obj.value
-
-        if college_name_cell_value and isinstance(college_name_cell_value, str):
-            college_name = college_name_cell_value.strip()
-            if college_name:
-                existing_excel_college_names.add(college_name)
-                current_row_cell_objects = []
-                for j in range(1, num_columns + 1):
-                    cell = sheet.cell(row=current_row_num, column=j)
-                    current_row_cell_objects.append(create_cell_data_object(cell))
-
-                existing_colleges_data.append({
-                    "name": college_name,
-                    "cell_objects": current_row_cell_objects, # Store list of cell_data_objects
-                    "is_new": False
-                })
-    return existing_colleges_data, existing_excel_college_names, header_cells_data, num_columns
-
-
-def combine_and_prepare_data(existing_colleges, json_colleges_set, existing_excel_names, num_data_columns, college_name_col_idx):
-    """Combines Excel and JSON data, marking colleges for highlighting and adding new ones."""
-    all_processed_data = []
-
-    for college in existing_colleges:
-        is_in_json = college["name"] in json_colleges_set
-        all_processed_data.append({
-            "name": college["name"],
-            "cell_objects": college["cell_objects"],
-            "is_in_json": is_in_json,
-            "is_new": False
-        })
-
-    for json_college_name in json_colleges_set:
-        if json_college_name not in existing_excel_names:
-            new_row_cell_objects = []
-            for i in range(num_data_columns):
-                col_idx_1_based = i + 1
-                cell_val = None
-                if col_idx_1_based == college_name_col_idx:
-                    cell_val = json_college_name
-                new_row_cell_objects.append({
-                    "value": cell_val,
-                    "fill": PatternFill(fill_type=None),
-                    "font": Font(bold=True),
-                    "hyperlink": None
-                })
-
-            all_processed_data.append({
-                "name": json_college_name,
-                "cell_objects": new_row_cell_objects,
-                "is_in_json": True,
-                "is_new": True
-            })
-    return all_processed_data
-
-def write_data_to_new_sheet(workbook_new, sheet_name, header_cell_content, sorted_data, teal_fill, college_name_col_idx, num_header_rows):
+    names, values, fill_ids, font_ids, hyperlink_ids, source_rows = [], [], [], [], [], []
+    name_col_offsets = _name_col_offsets(college_name_col_idx)
+    for row_idx, row in enumerate(
+            sheet.iter_rows(min_row=start_row, max_row=sheet.max_row, min_col=1, max_col=num_columns), start=start_row):
+        for name_col_offset in name_col_offsets:
+            college_name_cell_value = row[name_col_offset].value if name_col_offset < len(row) else None
+            if college_name_cell_value and isinstance(college_name_cell_value, str) and college_name_cell_value.strip():
+                break
+        else:
+            continue
+
+        names.append(college_name_cell_value.strip())
+        values.append([cell.value for cell in row])
+        fill_ids.append([style_interner.fill_id(cell) for cell in row])
+        font_ids.append([style_interner.font_id(cell) for cell in row])
+        hyperlink_ids.append([style_interner.hyperlink_id(cell) for cell in row])
+        source_rows.append(row_idx)
+
+    college_table = CollegeTable.from_rows(
+        style_interner, names, values, fill_ids, font_ids, hyperlink_ids, num_columns, source_rows
+    )
+    return college_table, header_cells_data, num_columns
+
+
+def combine_and_prepare_data(college_table, json_colleges_set, college_name_col_idx, teal_fill, matches=None):
+    """
+    Combines Excel and JSON data, marking colleges for highlighting and adding new ones.
+
+    Rows whose name is in the JSON set get teal_fill on their name cell, and every JSON
+    name missing from the sheet is appended as a new bold row (its name goes in the first
+    name column when college_name_col_idx lists several).
+
+    matches, if given, is this sheet's (cells, found) entry of NameIndex.match: the
+    (row, column) cells holding a JSON name, all of which are highlighted, and the JSON
+    names found anywhere in the sheet. Otherwise rows are matched on their name.
+    """
+    styles = college_table.styles
+    json_names = pd.Index(sorted(json_colleges_set), dtype=object)
+    num_columns = college_table.values.shape[1]
+    name_col_offset = _name_col_offsets(college_name_col_idx)[0]
+
+    # Hash-based membership in both directions: which cells to highlight, which names are new.
+    if matches is None:
+        existing_names = pd.Index(college_table.names, dtype=object)
+        in_json = existing_names.isin(json_names)
+        highlight_rows = np.flatnonzero(in_json)
+        highlight_col_offsets = np.full(len(highlight_rows), name_col_offset)
+        new_names = json_names[~json_names.isin(existing_names)].to_numpy()
+    else:
+        cells, found_names = matches
+        source_rows, columns = np.array(cells, dtype=np.int64).reshape(-1, 2).T
+        highlight_rows = pd.Index(college_table.source_rows).get_indexer(source_rows)
+        highlight_col_offsets = columns[highlight_rows >= 0] - 1
+        highlight_rows = highlight_rows[highlight_rows >= 0]
+        in_json = np.zeros(len(college_table), dtype=bool)
+        in_json[highlight_rows] = True
+        new_names = json_names[~json_names.isin(list(found_names))].to_numpy()
+
+    new_rows = CollegeTable(
+        styles,
+        new_names,
+        np.full((len(new_names), num_columns), None, dtype=object),
+        np.zeros((len(new_names), num_columns), dtype=np.int32),
+        np.full((len(new_names), num_columns), styles.add_font(NEW_ROW_FONT), dtype=np.int32),
+        np.zeros((len(new_names), num_columns), dtype=np.int32),
+        np.ones(len(new_names), dtype=bool),
+        np.ones(len(new_names), dtype=bool),
+    )
+    new_rows.values[:, name_col_offset] = new_rows.names
+
+    combined = CollegeTable(
+        styles, college_table.names, college_table.values, college_table.fill_ids.copy(),
+        college_table.font_ids, college_table.hyperlink_ids, in_json, college_table.is_new,
+        college_table.source_rows,
+    ).concat(new_rows)
+    teal_fill_id = styles.add_fill(teal_fill)
+    combined.fill_ids[highlight_rows, highlight_col_offsets] = teal_fill_id
+    combined.fill_ids[combined.is_new, name_col_offset] = teal_fill_id
+    return combined
+
+
+def sort_by_name(college_table):
+    """Returns the table's rows sorted case-insensitively by name; ties keep their current order."""
+    sort_keys = pd.Series(college_table.names, dtype=object).str.lower().to_numpy(dtype=str)
+    order = np.argsort(sort_keys, kind="stable")
+    return college_table.take(order)
+
+def _iter_table_rows(college_table):
+    """Returns an iterator of (values, fill ids, font ids, hyperlink ids) lists, one per row."""
+    # tolist() once per array is much cheaper than indexing NumPy arrays cell by cell.
+    return zip(
+        college_table.values.tolist(), college_table.fill_ids.tolist(),
+        college_table.font_ids.tolist(), college_table.hyperlink_ids.tolist(),
+    )
+
+def write_data_to_new_sheet(workbook_new, sheet_name, header_cell_content, college_table, num_header_rows):
     """Writes the processed and sorted data (including styles and hyperlinks) to a new sheet."""
     if sheet_name in workbook_new.sheetnames and len(workbook_new.sheetnames) > 1 and sheet_name != workbook_new.active.title:
         existing_sheet_to_remove = workbook_new[sheet_name]
@@ -122,96 +410,154 @@ def write_data_to_new_sheet(workbook_new, sheet_name, header_cell_content, sorte
     for r_idx, header_row_cells in enumerate(header_cell_content):
         for c_idx, cell_data_obj in enumerate(header_row_cells):
             new_cell = new_sheet.cell(row=r_idx + 1, column=c_idx + 1)
-            new_cell.value = cell_data_obj["value"]
-            if cell_data_obj["fill"] and cell_data_obj["fill"].fill_type:
-                new_cell.fill = cell_data_obj["fill"]
-            if cell_data_obj["font"]:
-                 new_cell.font = cell_data_obj["font"]
-            if cell_data_obj["hyperlink"]:
-                new_cell.hyperlink = cell_data_obj["hyperlink"]
+            new_cell.value = cell_data_obj.value
+            if cell_data_obj.fill and cell_data_obj.fill.fill_type:
+                new_cell.fill = cell_data_obj.fill
+            if cell_data_obj.font:
+                 new_cell.font = cell_data_obj.font
+            if cell_data_obj.hyperlink:
+                new_cell.hyperlink = cell_data_obj.hyperlink
 
     data_start_row = num_header_rows + 1
-    for r_idx, college_entry in enumerate(sorted_data):
+    output_styles = OutputStyles(workbook_new, college_table.styles)
+    for r_idx, (row_values, row_fill_ids, row_font_ids, row_hyperlink_ids) in enumerate(_iter_table_rows(college_table)):
         current_excel_row = data_start_row + r_idx
-        for c_idx, cell_data_obj in enumerate(college_entry['cell_objects']):
-            actual_col_idx_1_based = c_idx + 1
-            new_cell = new_sheet.cell(row=current_excel_row, column=actual_col_idx_1_based)
-            new_cell.value = cell_data_obj["value"]
+        for c_idx, value in enumerate(row_values):
+            new_cell = new_sheet.cell(row=current_excel_row, column=c_idx + 1)
+            new_cell.value = value
+            output_styles.apply(new_cell, row_fill_ids[c_idx], row_font_ids[c_idx], row_hyperlink_ids[c_idx])
+
+    return new_sheet
 
-            if cell_data_obj["font"]:
-                new_cell.font = cell_data_obj["font"]
+def _write_only_cell(sheet, value, fill, font, hyperlink):
+    """Builds a styled WriteOnlyCell."""
+    new_cell = WriteOnlyCell(sheet, value=value)
+    if fill is not None:
+        new_cell.fill = fill
+    if font:
+        new_cell.font = font
+    if hyperlink:
+        new_cell.hyperlink = hyperlink
+    return new_cell
+
+def write_data_to_streaming_sheet(workbook_new, sheet_name, header_cell_content, college_table):
+    """
+    Same output as write_data_to_new_sheet, but for a write-only workbook: rows are
+    built one at a time and appended in order, so memory does not grow with row count.
+    """
+    new_sheet = workbook_new.create_sheet(title=sheet_name)
 
-            if actual_col_idx_1_based == college_name_col_idx and college_entry['is_in_json']:
-                new_cell.fill = teal_fill
-            elif cell_data_obj["fill"] and cell_data_obj["fill"].fill_type:
-                new_cell.fill = cell_data_obj["fill"]
-            else:
-                new_cell.fill = PatternFill(fill_type=None)
+    for header_row_cells in header_cell_content:
+        new_sheet.append([
+            _write_only_cell(
+                new_sheet, cell_data_obj.value,
+                cell_data_obj.fill if cell_data_obj.fill and cell_data_obj.fill.fill_type else None,
+                cell_data_obj.font, cell_data_obj.hyperlink,
+            )
+            for cell_data_obj in header_row_cells
+        ])
 
-            if cell_data_obj["hyperlink"]:
-                new_cell.hyperlink = cell_data_obj["hyperlink"]
+    output_styles = OutputStyles(workbook_new, college_table.styles)
+    for row_values, row_fill_ids, row_font_ids, row_hyperlink_ids in _iter_table_rows(college_table):
+        row_cells = []
+        for value, fill_id, font_id, hyperlink_id in zip(row_values, row_fill_ids, row_font_ids, row_hyperlink_ids):
+            new_cell = WriteOnlyCell(new_sheet, value=value)
+            output_styles.apply(new_cell, fill_id, font_id, hyperlink_id)
+            row_cells.append(new_cell)
+        new_sheet.append(row_cells)
 
     return new_sheet
 
+def output_sheet_title(name_index, sheet_title):
+    """Returns the title of the output sheet written for one of name_index's sheets."""
+    # A single sheet keeps the output layout of the single-sheet workflow.
+    return NEW_SHEET_NAME if len(name_index.sheet_titles) == 1 else sheet_title
+
 # --- Main Processing Function ---
 
-def process_college_data_to_new_sheet(excel_filepath, json_college_names, output_filepath):
+def process_college_data_to_new_sheet(excel_filepath, json_college_names, output_filepath, write_only=False,
+                                      sheets=None, name_index=None):
     """
     Loads college data, processes it, preserves original styles and hyperlinks,
     highlights names from JSON in teal, adds new names from JSON alphabetically,
     and writes the result to a new sheet in a new Excel file.
+
+    excel_filepath may also be a workbook already loaded with workbook_loader.load_workbook,
+    in which case it is only read, never reloaded or modified.
+
+    With write_only=True the output is streamed through openpyxl's write-only mode,
+    which keeps memory flat for large rosters; the resulting file is the same.
+
+    sheets selects the input sheets to process (see name_index.select_sheets): by default
+    only the active one, written to the output sheet NEW_SHEET_NAME. When several are
+    selected, each gets its own output sheet with the same title, all from a single load
+    of the workbook. name_index, a NameIndex already built from the same workbook (as the
+    workflow's ground-truth stage does), replaces sheets and also sets the name columns and
+    header rows; without it, names are read from COLLEGE_NAME_COLUMN_IDX below HEADER_ROWS.
+
+    excel_filepath may be a path, raw bytes or a binary file-like object, and
+    output_filepath a path or a writable binary file-like object such as io.BytesIO.
     """
-    NEW_SHEET_NAME = "Sheet"
-    TEAL_COLOR_HEX = "03fdfd"
-    HEADER_ROWS = 3
-    COLLEGE_NAME_COLUMN_IDX = 1
-    
     json_colleges_set = load_json_colleges_from_string(json_college_names)
     if json_colleges_set is None:
         return False
 
     try:
-        original_workbook = openpyxl.load_workbook(excel_filepath)
-        original_sheet = original_workbook.active
+        original_workbook = load_workbook(excel_filepath)
     except FileNotFoundError:
-        print(f"Error: Excel file not found at '{excel_filepath}'")
+        print(f"Error: Excel file not found at '{source_label(excel_filepath)}'")
         return False
     except Exception as e:
-        print(f"Error loading Excel file '{excel_filepath}': {e}")
+        print(f"Error loading Excel file '{source_label(excel_filepath)}': {e}")
         return False
 
-    data_start_row = HEADER_ROWS + 1
-    existing_colleges, existing_excel_names, header_cell_content, num_data_columns = extract_excel_data(
-        original_sheet, data_start_row, COLLEGE_NAME_COLUMN_IDX, HEADER_ROWS
-    )
+    if name_index is None:
+        try:
+            name_index = NameIndex.build(original_workbook, sheets, COLLEGE_NAME_COLUMN_IDX, HEADER_ROWS)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return False
 
-    all_processed_data = combine_and_prepare_data(
-        existing_colleges, json_colleges_set, existing_excel_names, num_data_columns, COLLEGE_NAME_COLUMN_IDX
-    )
+    # One hash lookup per JSON name finds its cells in every sheet.
+    sheet_matches = name_index.match(json_colleges_set)
+    teal_fill = make_teal_fill()
+    output_workbook = openpyxl.Workbook(write_only=write_only)
+    if not write_only:
+        output_workbook.remove(output_workbook.active)
 
-    sorted_colleges_data = sorted(all_processed_data, key=lambda x: (x['name'] is None, str(x['name']).lower()))
+    output_titles = []
+    num_rows = 0
+    for sheet_title in name_index.sheet_titles:
+        college_table, header_cell_content, num_data_columns = extract_excel_data(
+            original_workbook[sheet_title], name_index.start_row + 1, name_index.column_idxs, name_index.start_row
+        )
 
-    output_workbook = openpyxl.Workbook()
-    if NEW_SHEET_NAME in output_workbook.sheetnames and NEW_SHEET_NAME == output_workbook.active.title and len(output_workbook.sheetnames) ==1:
-        pass
-    elif "Sheet" in output_workbook.sheetnames and len(output_workbook.sheetnames) == 1 :
-         output_workbook.remove(output_workbook["Sheet"])
+        combined_table = combine_and_prepare_data(
+            college_table, json_colleges_set, name_index.column_idxs, teal_fill, sheet_matches[sheet_title]
+        )
 
+        sorted_colleges_data = sort_by_name(combined_table)
+        num_rows += len(sorted_colleges_data)
 
-    teal_fill = PatternFill(start_color=TEAL_COLOR_HEX, end_color=TEAL_COLOR_HEX, fill_type="solid")
+        output_title = output_sheet_title(name_index, sheet_title)
+        output_titles.append(output_title)
+        if write_only:
+            write_data_to_streaming_sheet(output_workbook, output_title, header_cell_content, sorted_colleges_data)
+        else:
+            write_data_to_new_sheet(
+                output_workbook, output_title, header_cell_content, sorted_colleges_data, name_index.start_row
+            )
 
-    final_sheet = write_data_to_new_sheet(
-        output_workbook, NEW_SHEET_NAME, header_cell_content, sorted_colleges_data,
-        teal_fill, COLLEGE_NAME_COLUMN_IDX, HEADER_ROWS
-    )
-    if final_sheet:
-        output_workbook.active = final_sheet
+    if not write_only:
+        output_workbook.active = 0
 
     try:
-        output_workbook.save(output_filepath)
-        print(f"\nSuccessfully processed data and saved to '{output_filepath}' in sheet '{NEW_SHEET_NAME}'.")
+        with instrumentation.stage("excel_save", rows=num_rows, sheets=len(output_titles)):
+            output_workbook.save(output_filepath)
+        print(f"\nSuccessfully processed data and saved to '{source_label(output_filepath)}' "
+              f"in sheet(s) {', '.join(repr(title) for title in output_titles)}.")
         print("Original styles (fills, hyperlinks) should be preserved, with teal override for matched college names.")
         return True
     except Exception as e:
-        print(f"Error saving output workbook to '{output_filepath}': {e}")
-        return False
\ No newline at end of file
+        print(f"Error saving output workbook to '{source_label(output_filepath)}': {e}")
+        return False
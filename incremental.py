@@ -0,0 +1,454 @@
+import argparse
+import bisect
+import io
+import json
+
+from openpyxl.styles.fills import Fill
+from openpyxl.xml.functions import fromstring, tostring
+
+import cache
+import instrumentation
+import utils
+from apply_regex import DEFAULT_EXTRACTOR
+from highlight import (
+    COLLEGE_NAME_COLUMN_IDX, DEFAULT_FILL, HEADER_ROWS, NEW_ROW_FONT,
+    make_teal_fill, output_sheet_title, process_college_data_to_new_sheet,
+)
+from llm_filter import filter_college_names
+from name_index import NameIndex
+from name_matcher import NameMatcher
+from pdf_processor import iter_pdf_pages
+from workbook_loader import load_workbook, source_label, source_size
+
+# --- Configuration ---
+# Hidden sheet of the output workbook that remembers what the last run saw.
+STATE_SHEET_NAME = "_incremental_state"
+STATE_VERSION = 1
+# Excel cells hold at most 32,767 characters, so the state is split across rows.
+STATE_CHUNK_CHARS = 30000
+
+
+def read_state(workbook):
+    """Returns the incremental state stored in a previous output workbook, or None if it has none."""
+    if STATE_SHEET_NAME not in workbook.sheetnames:
+        return None
+    sheet = workbook[STATE_SHEET_NAME]
+    text = "".join(row[0] for row in sheet.iter_rows(min_col=1, max_col=1, values_only=True) if row[0])
+    try:
+        state = json.loads(text)
+    except json.JSONDecodeError:
+        print(f"Warning: the '{STATE_SHEET_NAME}' sheet is corrupt; ignoring it.")
+        return None
+    if state.get("version") != STATE_VERSION:
+        print(f"Warning: incremental state version {state.get('version')} is not supported; ignoring it.")
+        return None
+    return state
+
+
+def write_state(workbook, state):
+    """Stores the incremental state in a very hidden sheet of workbook, replacing any previous one."""
+    if STATE_SHEET_NAME in workbook.sheetnames:
+        workbook.remove(workbook[STATE_SHEET_NAME])
+    sheet = workbook.create_sheet(STATE_SHEET_NAME)
+    sheet.sheet_state = "veryHidden"
+    text = json.dumps(dict(state, version=STATE_VERSION))
+    for row_idx, start in enumerate(range(0, len(text), STATE_CHUNK_CHARS), start=1):
+        sheet.cell(row=row_idx, column=1, value=text[start:start + STATE_CHUNK_CHARS])
+
+
+def _fill_to_xml(fill):
+    return tostring(fill.to_tree()).decode("utf-8")
+
+
+def _fill_from_xml(xml):
+    return Fill.from_tree(fromstring(xml))
+
+
+def extract_page_candidates(page_texts, previous_pages):
+    """
+    Runs candidate extraction on every page whose text changed since the last run.
+
+    Args:
+        page_texts (iterable): The text of each page.
+        previous_pages (dict): {page text hash: sorted candidates} from the previous run.
+
+    Returns:
+        tuple: (pages, reused), where pages is {page text hash: sorted candidates} for the
+               current document and reused is how many pages were unchanged.
+    """
+    pages = {}
+    reused = 0
+    for page_text in page_texts:
+        page_hash = cache.content_hash(page_text)
+        if page_hash in pages:
+            continue
+        if page_hash in previous_pages:
+            pages[page_hash] = previous_pages[page_hash]
+            reused += 1
+        else:
+            pages[page_hash] = sorted(DEFAULT_EXTRACTOR.extract(page_text))
+    return pages, reused
+
+
+def attribute_filter_outputs(candidates, filtered_colleges):
+    """
+    Works out which candidate each name returned by the LLM filter came from.
+
+    The filter usually returns candidates verbatim, but may pick a more conventional
+    spelling; those are matched back with a NameMatcher over the candidates.
+
+    Returns:
+        tuple: ({candidate: [filtered names]}, [filtered names not traced to any candidate])
+    """
+    by_casefold = {candidate.casefold(): candidate for candidate in candidates}
+    matcher = NameMatcher(candidates)
+    outputs_by_candidate = {candidate: [] for candidate in candidates}
+    unattributed = []
+    for college in filtered_colleges:
+        candidate = by_casefold.get(college.casefold()) or matcher.match(college)
+        if candidate is None:
+            unattributed.append(college)
+        else:
+            outputs_by_candidate[candidate].append(college)
+    return outputs_by_candidate, unattributed
+
+
+def split_unattributed_batches(state, candidates):
+    """
+    Checks the names the LLM filter returned without a traceable candidate against the new PDF.
+
+    Such a name is stored with the batch of candidates that was filtered when it appeared.
+    It can't be tied to one of them, so it is only kept while every candidate of its batch is
+    still in the PDF; otherwise it is dropped, and the batch's remaining candidates are
+    filtered again, as a full run would do.
+
+    Returns:
+        tuple: (kept batches, candidates to filter again)
+    """
+    kept, refilter = [], set()
+    for batch in state["unattributed"]:
+        if set(batch["candidates"]) <= candidates:
+            kept.append(batch)
+        else:
+            refilter.update(candidate for candidate in batch["candidates"] if candidate in candidates)
+    return kept, refilter
+
+
+def _merge_colleges(candidate_colleges, unattributed):
+    """Returns the final college list: every candidate's names plus the unattributed ones, de-duplicated."""
+    merged = []
+    seen = set()
+    for candidate in sorted(candidate_colleges):
+        for college in candidate_colleges[candidate]:
+            if college.casefold() not in seen:
+                seen.add(college.casefold())
+                merged.append(college)
+    for college in unattributed:
+        if college.casefold() not in seen:
+            seen.add(college.casefold())
+            merged.append(college)
+    return merged
+
+
+def _name_cells(sheet, row_idx, column_idxs):
+    """Returns the (column, name) of each name cell of a row that holds a name, in column order."""
+    cells = []
+    for col_idx in column_idxs:
+        value = sheet.cell(row=row_idx, column=col_idx).value
+        if isinstance(value, str) and value.strip():
+            cells.append((col_idx, value.strip()))
+    return cells
+
+
+def _cell_fill_xml(cell):
+    # highlight writes unfilled cells with DEFAULT_FILL, so that's what to restore later.
+    return _fill_to_xml(cell.fill if cell.fill.fill_type else DEFAULT_FILL)
+
+
+def patch_highlighted_sheet(sheet, previous_colleges, colleges, original_fills, added_rows,
+                            column_idxs=(COLLEGE_NAME_COLUMN_IDX,), start_row=HEADER_ROWS):
+    """
+    Updates a sheet written by highlight.process_college_data_to_new_sheet for a new college list.
+
+    Only cells and rows whose highlight changes are touched: newly matched name cells turn
+    teal, cells that no longer match get their original fill back, rows added for colleges
+    that are gone are deleted and rows for new colleges are inserted in sorted position. The
+    result is the same sheet a full run would write.
+
+    Args:
+        original_fills (dict): {college: [fill XML of each of its name cells]} for highlighted
+                               original cells; updated in place.
+        added_rows (set): Colleges that have a row only because they were in the list;
+                          updated in place.
+        column_idxs: The 1-based name columns, as in the NameIndex the sheet was written from.
+        start_row (int): The number of header rows above the data.
+
+    Returns:
+        int: The number of rows changed.
+    """
+    previous_set = set(previous_colleges)
+    current_set = set(colleges)
+    teal_fill = make_teal_fill()
+    first_name_col = column_idxs[0]
+    data_start_row = start_row + 1
+
+    cells_by_name = {}
+    rows_by_row_name = {}
+    for row_idx in range(data_start_row, sheet.max_row + 1):
+        name_cells = _name_cells(sheet, row_idx, column_idxs)
+        for col_idx, name in name_cells:
+            cells_by_name.setdefault(name, []).append((row_idx, col_idx))
+        if name_cells:
+            rows_by_row_name.setdefault(name_cells[0][1], []).append(row_idx)
+
+    changed_rows = set()
+    rows_to_delete = []
+    for college in previous_set - current_set:
+        if college in added_rows:
+            added_rows.discard(college)
+            rows_to_delete.extend(rows_by_row_name.get(college, []))
+            continue
+        fills = original_fills.pop(college, [])
+        for (row_idx, col_idx), fill_xml in zip(cells_by_name.get(college, []), fills):
+            sheet.cell(row=row_idx, column=col_idx).fill = _fill_from_xml(fill_xml)
+            changed_rows.add(row_idx)
+
+    new_colleges = []
+    for college in sorted(current_set - previous_set):
+        existing_cells = cells_by_name.get(college, [])
+        if not existing_cells:
+            new_colleges.append(college)
+            continue
+        original_fills[college] = []
+        for row_idx, col_idx in existing_cells:
+            cell = sheet.cell(row=row_idx, column=col_idx)
+            original_fills[college].append(_cell_fill_xml(cell))
+            cell.fill = teal_fill
+            changed_rows.add(row_idx)
+    changed_rows = len(changed_rows)
+
+    first_moved_row = None
+    for row_idx in sorted(rows_to_delete, reverse=True):
+        sheet.delete_rows(row_idx)
+        first_moved_row = row_idx
+        changed_rows += 1
+
+    if new_colleges:
+        num_columns = max(sheet.max_column, first_name_col)
+        sort_keys = []
+        for row_idx in range(data_start_row, sheet.max_row + 1):
+            name_cells = _name_cells(sheet, row_idx, column_idxs)
+            sort_keys.append(name_cells[0][1].lower() if name_cells else "")
+        for college in new_colleges:
+            # Rows are sorted case-insensitively, with rows added from the list after equal originals.
+            position = bisect.bisect_right(sort_keys, college.lower())
+            sort_keys.insert(position, college.lower())
+            row_idx = data_start_row + position
+            sheet.insert_rows(row_idx)
+            for col_idx in range(1, num_columns + 1):
+                cell = sheet.cell(row=row_idx, column=col_idx)
+                cell.font = NEW_ROW_FONT
+                cell.fill = DEFAULT_FILL
+            name_cell = sheet.cell(row=row_idx, column=first_name_col, value=college)
+            name_cell.fill = teal_fill
+            added_rows.add(college)
+            first_moved_row = row_idx if first_moved_row is None else min(first_moved_row, row_idx)
+            changed_rows += 1
+
+    if first_moved_row is not None:
+        # openpyxl moves cells on insert/delete but not the references stored in their hyperlinks.
+        for row in sheet.iter_rows(min_row=first_moved_row):
+            for cell in row:
+                if cell.hyperlink is not None:
+                    cell.hyperlink.ref = cell.coordinate
+    return changed_rows
+
+
+def _original_fills(sheet, colleges, column_idxs, start_row):
+    """
+    Returns ({college: [name cell fill XML]}, original names) for one sheet of the input workbook.
+
+    Cells are listed in the order the output sheet has them: rows sorted by name as highlight
+    sorts them, then by column.
+    """
+    college_set = set(colleges)
+    rows = []
+    for row_idx in range(start_row + 1, sheet.max_row + 1):
+        name_cells = _name_cells(sheet, row_idx, column_idxs)
+        if name_cells:
+            rows.append((name_cells[0][1].lower(), row_idx, name_cells))
+    rows.sort(key=lambda row: row[0])
+
+    fills = {}
+    names = set()
+    for _, row_idx, name_cells in rows:
+        for col_idx, name in name_cells:
+            names.add(name)
+            if name in college_set:
+                fills.setdefault(name, []).append(_cell_fill_xml(sheet.cell(row=row_idx, column=col_idx)))
+    return fills, names
+
+
+def workflow_incremental(previous_output, input_pdf_path, output_excel_path=None, input_excel_path=None,
+                         column="A", start_row=3, sheets=None, metrics=None):
+    """
+    Updates a previous output workbook for a new version of the student's PDF.
+
+    Page texts are hashed, and only pages that changed are searched for candidates. Only
+    candidates that weren't in the previous PDF go through the LLM filter and name
+    normalization, and only the rows whose highlight changes are rewritten. What the run
+    saw is stored in a hidden sheet of the output, ready for the next update.
+
+    Args:
+        previous_output: Path, bytes or file-like object of an output workbook written by
+            this function, or None for the first run.
+        input_pdf_path: Path, bytes or file-like object of the new PDF.
+        output_excel_path: Path or writable file-like object for the updated workbook.
+            If None, the workbook is built in memory and returned.
+        input_excel_path: The original spreadsheet. Only needed when previous_output is None
+            or has no incremental state, in which case a full run is done first.
+        column, start_row, sheets: Where the college names are in the original spreadsheet (see
+            orchestrator.workflow). They are used for the first run; later runs keep the sheets,
+            name columns and start row the output was first written with.
+
+    Returns:
+        bool, or io.BytesIO/None when output_excel_path is None (as workflow).
+    """
+    metrics = metrics or instrumentation.RunMetrics()
+    with metrics.activate():
+        output_workbook = None
+        state = None
+        with metrics.stage("load_previous", previous_bytes=source_size(previous_output)) as stage:
+            if previous_output is not None:
+                output_workbook = load_workbook(previous_output)
+                state = read_state(output_workbook)
+            stage["outputs"]["has_state"] = state is not None
+        if state is None:
+            if input_excel_path is None:
+                raise ValueError(
+                    f"'{source_label(previous_output)}' has no incremental state; pass input_excel_path "
+                    "to do a full first run."
+                )
+            state = {"pages": {}, "candidates": {}, "unattributed": [], "colleges": [],
+                     "added_rows": {}, "original_fills": {}, "ground_truth": None, "layout": None}
+            output_workbook = None
+
+        with metrics.stage("extract_candidates", pdf_bytes=source_size(input_pdf_path)) as stage:
+            pages, reused_pages = extract_page_candidates(iter_pdf_pages(input_pdf_path), state["pages"])
+            candidates = set().union(*pages.values())
+            unattributed_batches, refilter = split_unattributed_batches(state, candidates)
+            new_candidates = sorted((candidates - set(state["candidates"])) | refilter)
+            stage["outputs"].update(pages=len(pages), reused_pages=reused_pages, candidates=len(candidates),
+                                    new_candidates=len(new_candidates), refiltered=len(refilter))
+
+        with metrics.stage("llm_filter", candidates=len(new_candidates)) as stage:
+            filtered_colleges = []
+            if new_candidates:
+                filtered_colleges = json.loads(filter_college_names("\n".join(new_candidates)))["colleges"]
+            outputs_by_candidate, unattributed_outputs = attribute_filter_outputs(new_candidates, filtered_colleges)
+            stage["outputs"]["filtered"] = len(filtered_colleges)
+
+        input_workbook = None
+        name_index = None
+        with metrics.stage("ground_truth", column=column, start_row=start_row, sheets=sheets) as stage:
+            if state["ground_truth"] is None:
+                # The same index workflow builds, so the first run's output matches it.
+                input_workbook = load_workbook(input_excel_path)
+                name_index = NameIndex.build(input_workbook, sheets, column, start_row)
+                state["ground_truth"] = name_index.ground_truth_text()
+                state["layout"] = {
+                    "sheets": {output_sheet_title(name_index, title): title for title in name_index.sheet_titles},
+                    "column_idxs": name_index.column_idxs,
+                    "start_row": name_index.start_row,
+                }
+            stage["outputs"]["names"] = len(state["ground_truth"].splitlines())
+        layout = state["layout"]
+
+        with metrics.stage("normalize", names=len(filtered_colleges)) as stage:
+            mapping, normalized_colleges = {}, []
+            if filtered_colleges:
+                mapping, normalized_colleges = utils.map_college_names(state["ground_truth"], filtered_colleges)
+            # Candidates that are still in the PDF keep their previous result.
+            candidate_colleges = {
+                candidate: state["candidates"][candidate] for candidate in candidates if candidate in state["candidates"]
+            }
+            for candidate, outputs in outputs_by_candidate.items():
+                candidate_colleges[candidate] = [mapping[output] for output in outputs if mapping.get(output)]
+            attributed = {college for colleges in candidate_colleges.values() for college in colleges}
+            new_unattributed = [college for college in normalized_colleges if college not in attributed]
+            if new_unattributed:
+                unattributed_batches.append({"colleges": new_unattributed, "candidates": new_candidates})
+            unattributed = [college for batch in unattributed_batches for college in batch["colleges"]]
+            colleges = _merge_colleges(candidate_colleges, unattributed)
+            stage["outputs"]["colleges"] = len(colleges)
+            stage["outputs"]["added"] = len(set(colleges) - set(state["colleges"]))
+            stage["outputs"]["removed"] = len(set(state["colleges"]) - set(colleges))
+
+        with metrics.stage("highlight") as stage:
+            if output_workbook is None:
+                # First run: write the sheet in full, then remember which rows were highlighted.
+                full_output = io.BytesIO()
+                if not process_college_data_to_new_sheet(input_workbook, json.dumps({"colleges": colleges}), full_output,
+                                                         name_index=name_index):
+                    return None if output_excel_path is None else False
+                output_workbook = load_workbook(full_output.getvalue())
+                original_fills, added_rows = {}, {}
+                rows_changed = 0
+                for output_title, input_title in layout["sheets"].items():
+                    original_fills[output_title], original_names = _original_fills(
+                        input_workbook[input_title], colleges, layout["column_idxs"], layout["start_row"]
+                    )
+                    added_rows[output_title] = {college for college in colleges if college not in original_names}
+                    rows_changed += output_workbook[output_title].max_row - layout["start_row"]
+                stage["outputs"]["rows_changed"] = rows_changed
+            else:
+                original_fills = state["original_fills"]
+                added_rows = {title: set(colleges_added) for title, colleges_added in state["added_rows"].items()}
+                stage["outputs"]["rows_changed"] = sum(
+                    patch_highlighted_sheet(
+                        output_workbook[output_title], state["colleges"], colleges, original_fills[output_title],
+                        added_rows[output_title], layout["column_idxs"], layout["start_row"],
+                    )
+                    for output_title in layout["sheets"]
+                )
+
+            write_state(output_workbook, {
+                "pages": pages,
+                "candidates": candidate_colleges,
+                "unattributed": unattributed_batches,
+                "colleges": colleges,
+                "added_rows": {title: sorted(colleges_added) for title, colleges_added in added_rows.items()},
+                "original_fills": original_fills,
+                "ground_truth": state["ground_truth"],
+                "layout": layout,
+            })
+            output_workbook.active = output_workbook[next(iter(layout["sheets"]))]
+            output_target = io.BytesIO() if output_excel_path is None else output_excel_path
+            with instrumentation.stage("excel_save"):
+                output_workbook.save(output_target)
+            print(f"Updated output saved to '{source_label(output_target)}'.")
+
+    if output_excel_path is not None:
+        return True
+    output_target.seek(0)
+    return output_target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update a previous output workbook for a changed student PDF.")
+    parser.add_argument("previous_output", nargs="?", help="Output workbook from the previous run.")
+    parser.add_argument("pdf", help="The student's updated PDF.")
+    parser.add_argument("-o", "--output", required=True, help="Where to write the updated workbook.")
+    parser.add_argument("--excel", help="Original spreadsheet, needed for the first run.")
+    parser.add_argument("--column", default="A", help="Ground-truth column letter, or several separated by commas.")
+    parser.add_argument("--start-row", type=int, default=3, help="Row after which ground-truth names start.")
+    parser.add_argument("--sheets", help="'all', or comma-separated sheet titles to process (default: the active sheet).")
+    args = parser.parse_args()
+
+    if not workflow_incremental(args.previous_output, args.pdf, args.output, args.excel, args.column, args.start_row,
+                                args.sheets):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
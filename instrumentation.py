@@ -0,0 +1,237 @@
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+# --- Configuration ---
+# Append every stage record to this JSON-lines file, in addition to printing it.
+METRICS_PATH = os.environ.get("WORKFLOW_METRICS_PATH")
+# "cprofile" or "tracemalloc" to profile every workflow run without code changes.
+PROFILE_MODE = os.environ.get("WORKFLOW_PROFILE")
+
+_current_run = contextvars.ContextVar("current_run", default=None)
+_current_stage = contextvars.ContextVar("current_stage", default=None)
+
+
+def peak_rss_mb(include_children=True):
+    """
+    Returns the peak resident set size so far, in MiB.
+
+    This is a high-water mark over the whole life of the process, not the memory in use now.
+    With include_children, the largest peak of any finished child process counts too.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    if include_children:
+        peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+    return round(peak / 2**20, 1)
+
+
+class RunMetrics:
+    """
+    Collects one structured record per workflow stage.
+
+    Each record holds the stage's wall time, CPU time, memory, input/output sizes and
+    LLM token counts, and is printed as a JSON line when the stage ends. CPU time is
+    that of the stage's own thread, so stages running concurrently don't inflate each other.
+
+    Memory is reported as "rss_growth_mb", how far the stage raised this process's peak RSS
+    (0 if it stayed within memory an earlier stage had already reached), and
+    "process_peak_rss_mb", the process's peak so far when the stage ended. The process has
+    one peak, so growth during concurrent stages is counted in each of them.
+    """
+
+    def __init__(self, run_id=None, metrics_path=METRICS_PATH, echo=True, listener=None):
+        """
+        Args:
+            listener (callable, optional): Called as listener(event, record) with event
+                "started" or "finished" around every stage, e.g. to report progress.
+        """
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.metrics_path = metrics_path
+        self.echo = echo
+        self.listener = listener
+        self.records = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, **inputs):
+        """
+        Times a stage. The yielded record's "outputs" dict can be filled in by the caller.
+        """
+        record = {
+            "run_id": self.run_id,
+            "stage": name,
+            "started_at": time.time(),
+            "inputs": inputs,
+            "outputs": {},
+            "llm": {"requests": 0, "cache_hits": 0, "prompt_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+        }
+        token = _current_stage.set(record)
+        self._notify("started", record)
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        rss_started = peak_rss_mb(include_children=False)
+        try:
+            yield record
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["wall_seconds"] = round(time.perf_counter() - wall_started, 4)
+            record["cpu_seconds"] = round(time.thread_time() - cpu_started, 4)
+            rss_ended = peak_rss_mb(include_children=False)
+            record["rss_growth_mb"] = None if rss_ended is None else round(rss_ended - rss_started, 1)
+            record["process_peak_rss_mb"] = peak_rss_mb()
+            _current_stage.reset(token)
+            self._emit(record)
+
+    def _notify(self, event, record):
+        if self.listener is None:
+            return
+        try:
+            self.listener(event, record)
+        except Exception as e:
+            print(f"Warning: metrics listener failed on {event} of stage '{record['stage']}': {e}")
+
+    def _emit(self, record):
+        with self._lock:
+            self.records.append(record)
+            line = json.dumps(record, default=str)
+            if self.echo:
+                print(line)
+            if self.metrics_path:
+                try:
+                    with open(self.metrics_path, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+                except Exception as e:
+                    print(f"Warning: could not write metrics to '{self.metrics_path}': {e}")
+        self._notify("finished", record)
+
+    @contextmanager
+    def activate(self):
+        """Makes this the current run, so module-level stage() and record_llm_usage() report to it."""
+        token = _current_run.set(self)
+        try:
+            yield self
+        finally:
+            _current_run.reset(token)
+
+    def summary(self):
+        """Returns {stage name: wall seconds} for every recorded stage."""
+        return {record["stage"]: record["wall_seconds"] for record in self.records}
+
+
+@contextmanager
+def stage(name, **inputs):
+    """Times a stage of the current run, or does nothing if no run is active."""
+    run = _current_run.get()
+    if run is None:
+        yield {"inputs": inputs, "outputs": {}}
+        return
+    with run.stage(name, **inputs) as record:
+        yield record
+
+
+_llm_usage_lock = threading.Lock()
+
+
+def record_llm_usage(usage_metadata=None, cache_hit=False):
+    """
+    Adds one LLM request's token counts to the current stage, if any.
+
+    Args:
+        usage_metadata: The response's usage_metadata (prompt/candidates/total token counts).
+        cache_hit (bool): True if the response came from the cache instead of the API.
+    """
+    record = _current_stage.get()
+    if record is None:
+        return
+    with _llm_usage_lock:
+        llm_stats = record["llm"]
+        if cache_hit:
+            llm_stats["cache_hits"] += 1
+            return
+        llm_stats["requests"] += 1
+        if usage_metadata is not None:
+            llm_stats["prompt_tokens"] += getattr(usage_metadata, "prompt_token_count", None) or 0
+            llm_stats["output_tokens"] += getattr(usage_metadata, "candidates_token_count", None) or 0
+            llm_stats["total_tokens"] += getattr(usage_metadata, "total_token_count", None) or 0
+
+
+@contextmanager
+def profiled(mode=PROFILE_MODE, output_path=None, top=25):
+    """
+    Optionally profiles the enclosed block.
+
+    A cProfile.Profile only sees the thread that enabled it, so in "cprofile" mode every
+    thread started inside the block (e.g. the StageGraph's stage threads) gets its own
+    profiler, and their stats are merged into the report. Threads started before the block
+    and worker processes (e.g. sharded PDF extraction) are not profiled.
+
+    Args:
+        mode (str): "cprofile" to collect a cProfile (saved to output_path, default
+                    "workflow.prof"), "tracemalloc" to report the top allocation sites,
+                    or None to do nothing.
+        top (int): How many entries of the report to print.
+    """
+    if not mode:
+        yield
+        return
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        thread_profilers = []
+
+        def profile_thread(frame, event, arg):
+            # Runs once, on the new thread's first event; enable() then replaces this hook.
+            thread_profiler = cProfile.Profile()
+            thread_profilers.append(thread_profiler)
+            thread_profiler.enable()
+
+        threading.setprofile(profile_thread)
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            threading.setprofile(None)
+            stats = pstats.Stats(profiler)
+            for thread_profiler in thread_profilers:
+                stats.add(thread_profiler)
+            output_path = output_path or "workflow.prof"
+            stats.dump_stats(output_path)
+            report = io.StringIO()
+            stats.stream = report
+            stats.sort_stats("cumulative").print_stats(top)
+            print(report.getvalue())
+            print(f"cProfile stats saved to '{output_path}'.")
+    elif mode == "tracemalloc":
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"tracemalloc peak: {peak_bytes / 2**20:.1f} MiB. Top allocation sites:")
+            for statistic in snapshot.statistics("lineno")[:top]:
+                print(f"  {statistic}")
+    else:
+        raise ValueError(f"Unknown profile mode '{mode}'. Use 'cprofile' or 'tracemalloc'.")
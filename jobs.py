@@ -0,0 +1,227 @@
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+
+import cache
+from orchestrator import WORKFLOW_STAGES
+
+# --- Configuration ---
+JOBS_DB_PATH = os.environ.get("COLLEGE_JOBS_DB", os.path.join(cache.CACHE_DIR, "jobs.sqlite3"))
+MAX_JOB_WORKERS = int(os.environ.get("COLLEGE_JOB_WORKERS", 2))
+# Finished jobs (and their output workbooks) are purged after this long.
+JOB_RETENTION_SECONDS = int(os.environ.get("COLLEGE_JOB_RETENTION_SECONDS", 24 * 60 * 60))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+JOB_COLUMNS = (
+    "id", "status", "params", "output_name", "output", "stages", "metrics", "error", "pid",
+    "owner_host", "owner_pid", "submitted_at", "started_at", "finished_at",
+)
+
+
+def _connect(db_path):
+    connection = sqlite3.connect(db_path, timeout=30)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def _update_job(db_path, job_id, **fields):
+    assignments = ", ".join(f"{field} = ?" for field in fields)
+    with closing(_connect(db_path)) as connection, connection:
+        connection.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+
+def _process_alive(pid):
+    """Returns True unless the process with this id on this host is known to have exited."""
+    if os.name == "nt":
+        # os.kill can't probe a process on Windows without terminating it.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError: # It exists, but belongs to another user.
+        return True
+    return True
+
+
+def _execute_job(db_path, job_id, excel_bytes, pdf_bytes, params):
+    """Runs one job's workflow in a worker process, recording per-stage progress in the job table."""
+    from instrumentation import RunMetrics
+    from orchestrator import workflow
+
+    # Stages can run concurrently, so the listener is called from several threads.
+    stages = {}
+    stages_lock = threading.Lock()
+
+    def report_stage(event, record):
+        if record["stage"] not in WORKFLOW_STAGES:
+            return
+        with stages_lock:
+            stages[record["stage"]] = {
+                "status": RUNNING if event == "started" else (FAILED if "error" in record else DONE),
+                "wall_seconds": record.get("wall_seconds"),
+            }
+            _update_job(db_path, job_id, stages=json.dumps(stages))
+
+    _update_job(db_path, job_id, status=RUNNING, started_at=time.time(), pid=os.getpid())
+    metrics = RunMetrics(run_id=job_id, listener=report_stage)
+    output = None
+    try:
+        # Inputs and output stay in memory; only the finished workbook is stored, in the job row.
+        output_buffer = workflow(excel_bytes, pdf_bytes, None, column=params["column"],
+                                 start_row=params["start_row"], sheets=params.get("sheets"), metrics=metrics)
+        if output_buffer is not None:
+            status, error, output = DONE, None, output_buffer.getvalue()
+        else:
+            status, error = FAILED, "workflow did not produce the output workbook"
+    except Exception as e:
+        status, error = FAILED, f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+    _update_job(db_path, job_id, status=status, error=error, output=output, finished_at=time.time(),
+                metrics=json.dumps(metrics.records, default=str))
+    return status
+
+
+class JobQueue:
+    """
+    Runs workflow jobs in the background on a local process pool.
+
+    Jobs are recorded in a SQLite table, so any session can look up a job's status,
+    per-stage progress and result by its id. Uploads are handed to the worker in memory
+    and the finished workbook is stored in the job's row, so no files are written per job.
+    """
+
+    def __init__(self, db_path=JOBS_DB_PATH, max_workers=MAX_JOB_WORKERS):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with closing(_connect(db_path)) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    output_name TEXT NOT NULL,
+                    output BLOB,
+                    stages TEXT,
+                    metrics TEXT,
+                    error TEXT,
+                    pid INTEGER,
+                    owner_host TEXT,
+                    owner_pid INTEGER,
+                    submitted_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+        # The Streamlit server is multi-threaded, so don't fork it.
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self.purge_expired()
+        self._fail_interrupted()
+
+    def _dispatch(self, job_id, excel_bytes, pdf_bytes, params):
+        future = self._executor.submit(_execute_job, self.db_path, job_id, excel_bytes, pdf_bytes, params)
+
+        def on_done(future):
+            # The worker records its own result; this only catches a worker that died.
+            exception = future.exception()
+            if exception is not None:
+                _update_job(self.db_path, job_id, status=FAILED, finished_at=time.time(),
+                            error=f"{type(exception).__name__}: {exception}")
+
+        future.add_done_callback(on_done)
+
+    def _fail_interrupted(self):
+        """
+        Marks queued and running jobs as failed when the server process that submitted them
+        has stopped.
+
+        Several app processes can share the database, so jobs are only failed when their owner
+        (the submitting process, on this host) has exited; jobs owned by other hosts are left alone.
+        """
+        # Their uploads only ever lived in the owner's memory, so they can't be restarted.
+        host = socket.gethostname()
+        with closing(_connect(self.db_path)) as connection, connection:
+            owners = connection.execute(
+                "SELECT id, owner_pid FROM jobs WHERE status IN (?, ?) AND owner_host = ?", (QUEUED, RUNNING, host)
+            ).fetchall()
+            orphaned = [(row["id"],) for row in owners if not _process_alive(row["owner_pid"])]
+            connection.executemany(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                [(FAILED, "Interrupted by a server restart. Please submit the files again.", time.time(),
+                  job_id, QUEUED, RUNNING) for job_id, in orphaned],
+            )
+
+    def submit(self, excel_bytes, pdf_bytes, output_name="processed_colleges.xlsx", column="A", start_row=3,
+               sheets=None):
+        """
+        Queues a workflow run and returns its job id immediately.
+
+        Args:
+            excel_bytes (bytes): The uploaded spreadsheet.
+            pdf_bytes (bytes): The uploaded PDF.
+            output_name (str): File name to offer the result under.
+            column, start_row, sheets: Where the college names are (see orchestrator.workflow).
+        """
+        job_id = uuid.uuid4().hex
+        params = {"column": column, "start_row": start_row, "sheets": sheets}
+        with closing(_connect(self.db_path)) as connection, connection:
+            connection.execute(
+                "INSERT INTO jobs (id, status, params, output_name, owner_host, owner_pid, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(params), output_name, socket.gethostname(), os.getpid(), time.time()),
+            )
+        self._dispatch(job_id, excel_bytes, pdf_bytes, params)
+        return job_id
+
+    def get(self, job_id):
+        """
+        Returns a job's state as a dict, or None if there is no such job.
+
+        Besides the table columns, the dict has `stages` ({stage: {"status", "wall_seconds"}}),
+        `metrics` (the RunMetrics records once finished) and `progress` (0.0 to 1.0).
+        """
+        # The output workbook can be large, so it is only read by result().
+        columns = ", ".join(column for column in JOB_COLUMNS if column != "output")
+        with closing(_connect(self.db_path)) as connection:
+            row = connection.execute(f"SELECT {columns} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["stages"] = json.loads(job["stages"] or "{}")
+        job["metrics"] = json.loads(job["metrics"] or "[]")
+        if job["status"] == DONE:
+            job["progress"] = 1.0
+        else:
+            finished = sum(1 for stage in job["stages"].values() if stage["status"] == DONE)
+            job["progress"] = finished / len(WORKFLOW_STAGES)
+        return job
+
+    def result(self, job_id):
+        """Returns the output workbook's bytes for a finished job, or None if it isn't available."""
+        with closing(_connect(self.db_path)) as connection:
+            row = connection.execute("SELECT output FROM jobs WHERE id = ? AND status = ?", (job_id, DONE)).fetchone()
+        return None if row is None else row["output"]
+
+    def purge_expired(self, max_age_seconds=JOB_RETENTION_SECONDS):
+        """Deletes finished jobs, and their output workbooks, older than max_age_seconds."""
+        cutoff = time.time() - max_age_seconds
+        with closing(_connect(self.db_path)) as connection, connection:
+            deleted = connection.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (DONE, FAILED, cutoff)
+            ).rowcount
+        return deleted
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
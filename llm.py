@@ -1,15 +1,153 @@
+import asyncio
 import base64
+import concurrent.futures
+import contextvars
+import json
 import os
-from google import genai
-from google.genai import types
+import threading
+import time
+import weakref
+import cache
+import instrumentation
 from prompts import SYSTEM_PROMPT_FILTER
 
-def llm_gemini(user_prompt, system_prompt="", temperature=0.0):
-    client = genai.Client(
+# google-genai takes about half a second to import, so it is only loaded once a request is
+# actually built (see _genai); importing this module stays cheap for the app and workers.
+
+MODEL = "gemini-2.5-flash-preview-04-17"
+# Point the client at a different endpoint, e.g. a local stub server for tests.
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL")
+
+# --- Shared client ---
+_client = None
+_client_injected = False
+_client_lock = threading.Lock()
+# httpx async connection pools are bound to the event loop that opened them,
+# so async calls get one lazily created client per running loop.
+_async_clients = weakref.WeakKeyDictionary()
+# Event loop (and its thread) that run_async runs coroutines on, with the pid that started it.
+_shared_loop = None
+_shared_loop_pid = None
+# Optional semaphore-like object (acquire/release) capping in-flight requests,
+# shared across processes by the batch runner.
+_request_limiter = None
+
+
+def _genai():
+    """Returns the google.genai module and its types, importing them on first use."""
+    from google import genai
+    from google.genai import types
+    return genai, types
+
+
+def _create_client():
+    genai, types = _genai()
+    http_options = types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None
+    return genai.Client(
         api_key=os.environ.get("GEMINI_API_KEY"),
+        http_options=http_options,
     )
 
-    model = "gemini-2.5-flash-preview-04-17"
+
+def get_client():
+    """
+    Returns the shared Gemini client, creating it on first use.
+
+    Reusing a single client keeps its HTTP connection pool (and TLS sessions)
+    warm across calls instead of paying the setup cost on every request.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+    return _client
+
+
+def set_client(client):
+    """
+    Replaces the shared client used by llm_gemini, llm_gemini_async and llm_gemini_stream_async.
+
+    Args:
+        client: Any object exposing `models.generate_content` (and `aio.models.generate_content`
+                and `aio.models.generate_content_stream` for async and streaming calls), e.g. a
+                fake for tests or a genai.Client pointed at a stub server. Pass None to go back
+                to a lazily created default client.
+    """
+    global _client, _client_injected
+    with _client_lock:
+        _client = client
+        _client_injected = client is not None
+        _async_clients.clear()
+
+
+def set_request_limiter(limiter):
+    """
+    Caps how many Gemini requests may be in flight at once.
+
+    Args:
+        limiter: Any object with blocking acquire() and release() methods, e.g. a
+                 threading.BoundedSemaphore or a multiprocessing.Manager().BoundedSemaphore()
+                 shared between worker processes. Pass None to remove the cap.
+    """
+    global _request_limiter
+    _request_limiter = limiter
+
+
+def _get_async_client():
+    """Returns the client to use for async calls on the currently running event loop."""
+    if _client_injected:
+        return _client
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = _create_client()
+    return client
+
+
+def _get_shared_loop():
+    global _shared_loop, _shared_loop_pid
+    with _client_lock:
+        # A forked child inherits the loop object but not the thread running it.
+        if _shared_loop is None or _shared_loop_pid != os.getpid():
+            _shared_loop = asyncio.new_event_loop()
+            _shared_loop_pid = os.getpid()
+            threading.Thread(target=_shared_loop.run_forever, name="llm-event-loop", daemon=True).start()
+        return _shared_loop
+
+
+def run_async(coroutine):
+    """
+    Runs a coroutine to completion on this process's shared event loop and returns its result.
+
+    asyncio.run would start a new loop per call, and with it a new async client (see
+    _get_async_client) whose connection pool is never reused or closed. The coroutine runs in
+    a copy of the caller's context, so instrumentation still reports to the caller's stage.
+    """
+    loop = _get_shared_loop()
+    result = concurrent.futures.Future()
+
+    def start():
+        task = asyncio.ensure_future(coroutine)
+
+        def finish(task):
+            if task.cancelled():
+                result.cancel()
+            elif task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(task.result())
+
+        task.add_done_callback(finish)
+
+    loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+    return result.result()
+
+
+def _build_request(user_prompt, system_prompt, temperature, response_mime_type="text/plain", response_schema=None):
+    """Builds the contents and generation config shared by the sync, async and streaming calls."""
+    _, types = _genai()
     contents = [
         types.Content(
             role="user",
@@ -25,24 +163,173 @@ def llm_gemini(user_prompt, system_prompt="", temperature=0.0):
         ),
     ]
     generate_content_config = types.GenerateContentConfig(
-        response_mime_type="text/plain",
+        response_mime_type=response_mime_type,
+        response_schema=response_schema,
         system_instruction=[
             types.Part.from_text(text=system_prompt),
         ],
         temperature=temperature,
     )
+    return contents, generate_content_config
 
-    response = client.models.generate_content(
-        model=model,
-        contents=contents,
-        config=generate_content_config,
-    )
-    
-    # parse ```json ... ``` to just the json
-    data = response.text
+
+def clean_response_text(data):
+    """Strips ```json fences from a response; JSON-mode replies come back unfenced and pass through unchanged."""
     data = data.strip('` \n')
 
     if data.startswith('json'):
         data = data[4:]
+    return data
+
+
+def _cache_key(user_prompt, system_prompt, temperature, response_mime_type, response_schema):
+    # Identical prompts at temperature 0 give interchangeable answers, so reuse them.
+    # The response mode is part of the key: a plain-text answer isn't a valid JSON-mode one.
+    response_mode = f"{response_mime_type}:{json.dumps(response_schema, sort_keys=True)}"
+    return cache.content_hash(MODEL, str(temperature), response_mode, system_prompt, user_prompt)
+
 
+def llm_gemini(user_prompt, system_prompt="", temperature=0.0, use_cache=True, client=None,
+               response_mime_type="text/plain", response_schema=None):
+    """
+    Sends a prompt to Gemini and returns the response text with any ```json fences removed.
+
+    In JSON mode, a response is only cached if it is valid JSON.
+
+    Args:
+        client: Optional client to use instead of the shared one (see set_client).
+        response_mime_type (str): "application/json" asks for a JSON reply instead of plain text.
+        response_schema (dict, optional): Schema the JSON reply must follow (see prompts).
+    """
+    cache_key = _cache_key(user_prompt, system_prompt, temperature, response_mime_type, response_schema)
+    if use_cache:
+        cached_response = cache.llm_response_cache.get(cache_key)
+        if cached_response is not None:
+            instrumentation.record_llm_usage(cache_hit=True)
+            return cached_response
+    started = time.perf_counter()
+
+    client = client or get_client()
+    contents, generate_content_config = _build_request(user_prompt, system_prompt, temperature,
+                                                       response_mime_type, response_schema)
+    limiter = _request_limiter
+    if limiter is not None:
+        limiter.acquire()
+    try:
+        response = client.models.generate_content(
+            model=MODEL,
+            contents=contents,
+            config=generate_content_config,
+        )
+    finally:
+        if limiter is not None:
+            limiter.release()
+    instrumentation.record_llm_usage(getattr(response, "usage_metadata", None))
+    data = clean_response_text(response.text)
+
+    if use_cache and (response_mime_type != "application/json" or _is_json(data)):
+        # A truncated JSON reply would otherwise be replayed from the cache on every run.
+        cache.llm_response_cache.set(cache_key, data, cost_seconds=time.perf_counter() - started)
     return data
+
+
+async def llm_gemini_async(user_prompt, system_prompt="", temperature=0.0, use_cache=True, client=None,
+                           response_mime_type="text/plain", response_schema=None):
+    """
+    Async counterpart of llm_gemini, so several prompts can be in flight concurrently.
+
+    Args:
+        client: Optional client to use instead of the shared one (see set_client).
+    """
+    cache_key = _cache_key(user_prompt, system_prompt, temperature, response_mime_type, response_schema)
+    if use_cache:
+        cached_response = cache.llm_response_cache.get(cache_key)
+        if cached_response is not None:
+            instrumentation.record_llm_usage(cache_hit=True)
+            return cached_response
+    started = time.perf_counter()
+
+    client = client or _get_async_client()
+    contents, generate_content_config = _build_request(user_prompt, system_prompt, temperature,
+                                                       response_mime_type, response_schema)
+    limiter = _request_limiter
+    if limiter is not None:
+        # The limiter may be a cross-process proxy, so wait for it off the event loop.
+        await asyncio.to_thread(limiter.acquire)
+    try:
+        response = await client.aio.models.generate_content(
+            model=MODEL,
+            contents=contents,
+            config=generate_content_config,
+        )
+    finally:
+        if limiter is not None:
+            limiter.release()
+    instrumentation.record_llm_usage(getattr(response, "usage_metadata", None))
+    data = clean_response_text(response.text)
+
+    if use_cache and (response_mime_type != "application/json" or _is_json(data)):
+        # A truncated JSON reply would otherwise be replayed from the cache on every run.
+        cache.llm_response_cache.set(cache_key, data, cost_seconds=time.perf_counter() - started)
+    return data
+
+
+async def llm_gemini_stream_async(user_prompt, system_prompt="", temperature=0.0, use_cache=True, client=None,
+                                  response_mime_type="text/plain", response_schema=None):
+    """
+    Streaming counterpart of llm_gemini_async: yields the response text piece by piece as it arrives.
+
+    The pieces are not cleaned of ```json fences; join them and use clean_response_text for that.
+    A cached response is yielded as a single piece. A response is only cached once the stream
+    has finished and, in JSON mode, only if it is valid JSON.
+
+    Args:
+        client: Optional client to use instead of the shared one (see set_client); it must
+                expose `aio.models.generate_content_stream`.
+    """
+    cache_key = _cache_key(user_prompt, system_prompt, temperature, response_mime_type, response_schema)
+    if use_cache:
+        cached_response = cache.llm_response_cache.get(cache_key)
+        if cached_response is not None:
+            instrumentation.record_llm_usage(cache_hit=True)
+            yield cached_response
+            return
+    started = time.perf_counter()
+
+    client = client or _get_async_client()
+    contents, generate_content_config = _build_request(user_prompt, system_prompt, temperature,
+                                                       response_mime_type, response_schema)
+    limiter = _request_limiter
+    if limiter is not None:
+        await asyncio.to_thread(limiter.acquire)
+    pieces = []
+    usage_metadata = None
+    try:
+        stream = await client.aio.models.generate_content_stream(
+            model=MODEL,
+            contents=contents,
+            config=generate_content_config,
+        )
+        async for chunk in stream:
+            # Usage is reported cumulatively, so the last chunk that carries it has the totals.
+            usage_metadata = getattr(chunk, "usage_metadata", None) or usage_metadata
+            if chunk.text:
+                pieces.append(chunk.text)
+                yield chunk.text
+    finally:
+        if limiter is not None:
+            limiter.release()
+    instrumentation.record_llm_usage(usage_metadata)
+
+    data = clean_response_text("".join(pieces))
+    if use_cache and (response_mime_type != "application/json" or _is_json(data)):
+        # A truncated JSON reply would otherwise be replayed from the cache on every run.
+        cache.llm_response_cache.set(cache_key, data, cost_seconds=time.perf_counter() - started)
+
+
+def _is_json(data):
+    try:
+        json.loads(data)
+    except json.JSONDecodeError:
+        return False
+    return True
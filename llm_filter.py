@@ -0,0 +1,245 @@
+import asyncio
+import json
+import math
+import re
+import llm
+from prompts import SYSTEM_PROMPT_FILTER, COLLEGES_RESPONSE_SCHEMA
+
+# --- Configuration ---
+# Rough size of one chunk of candidates sent to the filter prompt, in tokens.
+CHUNK_TOKEN_BUDGET = 1500
+# Maximum number of filter requests in flight at once.
+MAX_CONCURRENT_REQUESTS = 4
+# Gemini averages roughly four characters of English per token.
+CHARS_PER_TOKEN = 4
+
+_COLLEGES_ARRAY_RE = re.compile(r'"colleges"\s*:\s*\[')
+_ARRAY_SEPARATORS = " \t\r\n,"
+
+
+def estimate_tokens(text):
+    """Returns a cheap estimate of how many tokens the text will use."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def chunk_candidates(candidates, token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    Splits candidate names into consecutive chunks that each fit within a token budget.
+
+    Args:
+        candidates (list): Candidate college names, in the order they should be sent.
+        token_budget (int): Maximum estimated tokens per chunk. A single candidate larger
+                            than the budget still gets a chunk of its own.
+
+    Returns:
+        list: A list of chunks, each a list of candidate names.
+    """
+    chunks = []
+    current_chunk = []
+    current_tokens = 0
+    for candidate in candidates:
+        candidate_tokens = estimate_tokens(candidate) + 1 # +1 for the joining newline
+        if current_chunk and current_tokens + candidate_tokens > token_budget:
+            chunks.append(current_chunk)
+            current_chunk = []
+            current_tokens = 0
+        current_chunk.append(candidate)
+        current_tokens += candidate_tokens
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def parse_colleges_response(response_text):
+    """
+    Parses the `colleges` array out of a filter response.
+
+    Returns:
+        list or None: The college names, or None if the response is not valid JSON.
+    """
+    try:
+        colleges = json.loads(llm.clean_response_text(response_text)).get("colleges", [])
+    except (json.JSONDecodeError, AttributeError):
+        return None
+    if not isinstance(colleges, list):
+        return None
+    return [college for college in colleges if isinstance(college, str)]
+
+
+class CollegeStreamParser:
+    """
+    Incrementally parses the `colleges` array of a filter response as its text streams in.
+
+    feed() returns the names completed by each new piece of text, so they can be used before
+    the reply has finished; finish() falls back to those names if the whole reply turns out
+    to be truncated or malformed.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._decoder = json.JSONDecoder()
+        # Index of the next unparsed array item, once the array has been found.
+        self._position = None
+        self._array_closed = False
+        self.colleges = []
+
+    def feed(self, text):
+        """Adds a piece of the response and returns the college names it completed."""
+        self._buffer += text
+        completed = []
+        if self._position is None:
+            match = _COLLEGES_ARRAY_RE.search(self._buffer)
+            if match is None:
+                return completed
+            self._position = match.end()
+        while not self._array_closed:
+            position = self._position
+            while position < len(self._buffer) and self._buffer[position] in _ARRAY_SEPARATORS:
+                position += 1
+            if position == len(self._buffer):
+                break
+            if self._buffer[position] == "]":
+                self._array_closed = True
+                break
+            try:
+                item, end = self._decoder.raw_decode(self._buffer, position)
+            except json.JSONDecodeError:
+                break # The item is still incomplete (or malformed); wait for more text.
+            if not isinstance(item, str) and end == len(self._buffer):
+                break # A number or literal may continue in the next piece.
+            self._position = end
+            if isinstance(item, str):
+                completed.append(item)
+        self.colleges.extend(completed)
+        return completed
+
+    def finish(self):
+        """
+        Returns:
+            tuple: (colleges, complete). complete is True if the whole response parsed as
+                   JSON; otherwise colleges holds the names salvaged while streaming.
+        """
+        colleges = parse_colleges_response(self._buffer)
+        if colleges is not None:
+            return colleges, True
+        return list(self.colleges), False
+
+
+def merge_college_lists(college_lists):
+    """Merges several college lists, keeping the first spelling of each case-insensitive duplicate."""
+    merged = []
+    seen = set()
+    for colleges in college_lists:
+        for college in colleges:
+            key = college.strip().casefold()
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(college.strip())
+    return merged
+
+
+def _unanswered_candidates(chunk, salvaged_colleges):
+    """
+    Returns the candidates after the last one a truncated reply got to.
+
+    The filter answers in candidate order, so everything up to the last candidate that
+    reappears verbatim in the salvaged names has been covered.
+    """
+    salvaged = {college.strip().casefold() for college in salvaged_colleges}
+    for index in range(len(chunk) - 1, -1, -1):
+        if chunk[index].strip().casefold() in salvaged:
+            return chunk[index + 1:]
+    return chunk
+
+
+async def _stream_filter(candidates, on_college, use_cache=True):
+    """Streams one filter request, passing each college to on_college as soon as it is parsed."""
+    parser = CollegeStreamParser()
+    async for text in llm.llm_gemini_stream_async(
+        user_prompt="\n".join(candidates),
+        system_prompt=SYSTEM_PROMPT_FILTER,
+        use_cache=use_cache,
+        response_mime_type="application/json",
+        response_schema=COLLEGES_RESPONSE_SCHEMA,
+    ):
+        for college in parser.feed(text):
+            if on_college is not None:
+                on_college(college)
+    return parser.finish()
+
+
+async def _filter_chunk(chunk, semaphore, on_college=None):
+    async with semaphore:
+        colleges, complete = await _stream_filter(chunk, on_college)
+        if not complete:
+            # Usually a truncated reply: keep what arrived and only ask again, without the
+            # cache, for the candidates it didn't get to.
+            remaining = _unanswered_candidates(chunk, colleges)
+            complete = not remaining
+            if remaining:
+                print(f"Warning: malformed filter response for a chunk of {len(chunk)} candidates; "
+                      f"salvaged {len(colleges)} names, retrying the last {len(remaining)} candidates.")
+                retried_colleges, complete = await _stream_filter(remaining, on_college, use_cache=False)
+                colleges = colleges + retried_colleges
+    if not complete:
+        print(f"Error: could not fully parse the filter response for a chunk of {len(chunk)} candidates; "
+              f"keeping the {len(colleges)} names that were salvaged.")
+    return colleges
+
+
+async def _deduplicate_across_chunks(colleges):
+    """
+    Sends the merged names of several chunks through the filter prompt once more.
+
+    Chunks are consecutive slices of the sorted candidates, so the prompt's "include ONE
+    conventional name" rule never sees, e.g., "UPenn" and "University of Pennsylvania"
+    together when they fall in different chunks.
+    """
+    deduplicated, complete = await _stream_filter(colleges, on_college=None)
+    if not complete:
+        print(f"Warning: malformed response when de-duplicating {len(colleges)} names across chunks; "
+              "keeping them as merged.")
+        return colleges
+    return merge_college_lists([deduplicated])
+
+
+async def filter_college_names_async(regex_results, token_budget=CHUNK_TOKEN_BUDGET,
+                                     max_concurrency=MAX_CONCURRENT_REQUESTS, on_college=None):
+    """
+    Filters regex candidates down to real college names with SYSTEM_PROMPT_FILTER,
+    sending token-budgeted chunks concurrently and streaming their JSON replies.
+
+    Args:
+        regex_results (str): Newline-separated candidate names, as returned by regex_college_names.
+        token_budget (int): Maximum estimated tokens of candidates per request.
+        max_concurrency (int): Maximum number of requests in flight at once.
+        on_college (callable, optional): Called with each college name as soon as it has been
+                                         parsed from a reply, before the merged result is ready.
+                                         Names may repeat across chunks, and may be
+                                         folded into another spelling of the same college
+                                         in the final result.
+
+    Returns:
+        str: A JSON string of the form {"colleges": [...]}. With several chunks, their
+             results are merged and sent through the filter once more, so duplicates that
+             were split across chunks are collapsed as in a single request.
+    """
+    candidates = [line for line in regex_results.splitlines() if line.strip()]
+    chunks = chunk_candidates(candidates, token_budget)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    chunk_results = await asyncio.gather(*(_filter_chunk(chunk, semaphore, on_college) for chunk in chunks))
+    colleges = merge_college_lists(chunk_results)
+    if len(chunks) > 1 and len(colleges) > 1:
+        colleges = await _deduplicate_across_chunks(colleges)
+    return json.dumps({"colleges": colleges})
+
+
+def filter_college_names(regex_results, token_budget=CHUNK_TOKEN_BUDGET, max_concurrency=MAX_CONCURRENT_REQUESTS,
+                         on_college=None):
+    """
+    Synchronous wrapper around filter_college_names_async.
+
+    It runs on llm's shared event loop (see llm.run_async), so on_college is called from
+    that loop's thread.
+    """
+    return llm.run_async(filter_college_names_async(regex_results, token_budget, max_concurrency, on_college))
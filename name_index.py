@@ -0,0 +1,111 @@
+from utils import column_indexes
+
+# Selects every worksheet of the workbook (see select_sheets).
+ALL_SHEETS = "all"
+
+
+def select_sheets(workbook, sheets=None):
+    """
+    Returns the worksheets to read from a loaded workbook.
+
+    Args:
+        workbook (openpyxl.Workbook): The loaded workbook.
+        sheets: None for the active sheet, "all" for every worksheet in workbook order, or
+                sheet titles in the order to process them: a list, a single title, or a
+                comma-separated string of titles.
+
+    Raises:
+        ValueError: If a title doesn't name one of the workbook's worksheets.
+    """
+    if sheets is None:
+        return [workbook.active]
+    titles = [sheet.title for sheet in workbook.worksheets]
+    if isinstance(sheets, str):
+        if sheets.strip().lower() == ALL_SHEETS:
+            return list(workbook.worksheets)
+        # Titles may contain commas themselves, so only split when the whole string isn't one.
+        sheets = [sheets] if sheets in titles else [title.strip() for title in sheets.split(",") if title.strip()]
+    missing = [title for title in sheets if title not in titles]
+    if missing:
+        raise ValueError(f"Sheet(s) not found: {', '.join(missing)}. The workbook has: {', '.join(titles)}.")
+    if not sheets:
+        raise ValueError("At least one sheet must be selected.")
+    return [workbook[title] for title in dict.fromkeys(sheets)]
+
+
+class NameIndex:
+    """
+    Hash index of the college names in a workbook's selected sheets and name columns.
+
+    It is built in one pass over the name columns of every selected sheet and maps each name
+    to all the (sheet title, row, column) cells it appears in. The ground-truth list and the
+    highlighting of every sheet are both read from it, so a workbook with one tab per student
+    is loaded and scanned once instead of once per tab.
+    """
+
+    def __init__(self, sheet_titles, column_idxs, start_row):
+        self.sheet_titles = sheet_titles
+        self.column_idxs = column_idxs
+        self.start_row = start_row
+        self.positions = {}
+
+    @classmethod
+    def build(cls, workbook, sheets=None, columns="A", start_row=3):
+        """
+        Indexes the names in the given sheets and columns of a loaded workbook.
+
+        Args:
+            workbook (openpyxl.Workbook): The loaded workbook (see workbook_loader.load_workbook).
+            sheets: Which sheets to read (see select_sheets); by default the active one.
+            columns: The columns holding college names (see utils.column_indexes).
+            start_row (int): The 1-based row *after which* names start; the rows above it are headers.
+
+        Raises:
+            ValueError: If a sheet, a column or start_row is invalid.
+        """
+        if not isinstance(start_row, int) or start_row < 0:
+            raise ValueError("'start_row' must be a non-negative integer (0 or greater).")
+        worksheets = select_sheets(workbook, sheets)
+        column_idxs = column_indexes(columns)
+        index = cls([sheet.title for sheet in worksheets], column_idxs, start_row)
+
+        min_col, max_col = min(column_idxs), max(column_idxs)
+        for sheet in worksheets:
+            rows = sheet.iter_rows(min_row=start_row + 1, min_col=min_col, max_col=max_col, values_only=True)
+            for row_idx, row in enumerate(rows, start=start_row + 1):
+                for column_idx in column_idxs:
+                    value = row[column_idx - min_col]
+                    if isinstance(value, str) and value.strip():
+                        index.positions.setdefault(value.strip(), []).append((sheet.title, row_idx, column_idx))
+        return index
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def names(self):
+        """Returns the distinct names, in the order they were first seen."""
+        return list(self.positions)
+
+    def ground_truth_text(self):
+        """Returns the distinct names as a newline-separated string, the ground-truth format utils expects."""
+        return "\n".join(self.positions)
+
+    def match(self, names):
+        """
+        Looks up names in every indexed sheet at once, with one hash lookup per name.
+
+        Returns:
+            dict: {sheet title: (cells, found)} for each indexed sheet, where cells lists the
+                  (row, column) cells of that sheet holding one of names, and found is the set
+                  of names that appear in that sheet.
+        """
+        matches = {title: ([], set()) for title in self.sheet_titles}
+        for name in names:
+            for title, row, column in self.positions.get(name, ()):
+                cells, found = matches[title]
+                cells.append((row, column))
+                found.add(name)
+        return matches
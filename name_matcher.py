@@ -0,0 +1,181 @@
+import heapq
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+# --- Configuration ---
+# Trigram (Dice) similarity a ground-truth name needs to be considered for a fuzzy match.
+FUZZY_SHORTLIST_THRESHOLD = 0.5
+# How many of the most similar ground-truth names get the order-sensitive comparison.
+FUZZY_SHORTLIST_SIZE = 5
+# Minimum order-sensitive similarity for a fuzzy match. Trigram sets ignore word order,
+# so on their own they confuse "Miami University" with "University of Miami".
+FUZZY_MATCH_THRESHOLD = 0.9
+# How far the best fuzzy candidate must lead the runner-up to be trusted.
+FUZZY_MATCH_MARGIN = 0.05
+# Two-letter acronyms ("BU", "UM") are too ambiguous to resolve locally.
+MIN_ACRONYM_LENGTH = 3
+# Words skipped when deriving an acronym, e.g. "Massachusetts Institute of Technology" -> "MIT".
+ACRONYM_STOPWORDS = {"of", "the", "and", "at", "de", "for", "in", "&"}
+# Values pandas/openpyxl produce for empty cells, which are never college names.
+EMPTY_CELL_VALUES = {"", "nan", "none"}
+
+_NON_WORD_RE = re.compile(r"[^\w\s&]")
+_WHITESPACE_RE = re.compile(r"\s+")
+_ACRONYM_RE = re.compile(r"^[A-Z]{2,7}$")
+
+
+def normalize_name(name):
+    """Casefolds a name and strips punctuation and repeated whitespace."""
+    name = _NON_WORD_RE.sub(" ", name.casefold())
+    return _WHITESPACE_RE.sub(" ", name).strip()
+
+
+def derive_acronym(name):
+    """Returns the initials of a multi-word name's significant words, e.g. "MIT"."""
+    words = [word for word in re.split(r"[\s-]+", name.strip()) if word]
+    if len(words) < 2:
+        return None
+    initials = [word[0] for word in words if word.casefold() not in ACRONYM_STOPWORDS and word[0].isalpha()]
+    return "".join(initials).upper() if len(initials) >= 2 else None
+
+
+def significant_words(normalized):
+    """Returns the words of a normalized name, minus stopwords such as "of" and "the"."""
+    return frozenset(normalized.split()) - ACRONYM_STOPWORDS
+
+
+def trigrams(text):
+    """Returns the set of character trigrams of a normalized name, padded at word edges."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameMatcher:
+    """
+    Resolves extracted college names onto ground-truth spellings without an LLM.
+
+    Names are tried against, in order: an exact index, a casefold/punctuation-insensitive
+    index, an acronym index ("MIT" -> "Massachusetts Institute of Technology", only when a
+    single ground-truth name has those initials), and a trigram inverted index whose best
+    candidates are confirmed with an order-sensitive similarity ratio and must have the same
+    significant words.
+
+    A long name is never resolved onto a ground-truth acronym from its initials alone:
+    "University of Northern Colorado" and "UNC" are different colleges. Such names, like
+    misspellings, are left to the LLM.
+    """
+
+    def __init__(self, ground_truth_names):
+        self.ground_truth_names = []
+        self._exact = {}
+        self._normalized = {}
+        self._acronym_to_long_name = {}
+        self._ambiguous_acronyms = set()
+        self._trigram_index = defaultdict(set)
+        self._trigram_sets = []
+        self._normalized_names = []
+
+        for name in ground_truth_names:
+            name = str(name).strip()
+            if name.casefold() in EMPTY_CELL_VALUES or name in self._exact:
+                continue
+            self._add(name)
+
+    def _add(self, name):
+        self._exact[name] = name
+        normalized = normalize_name(name)
+        self._normalized.setdefault(normalized, name)
+
+        if not _ACRONYM_RE.match(name):
+            acronym = derive_acronym(name)
+            if acronym and len(acronym) >= MIN_ACRONYM_LENGTH:
+                if acronym in self._acronym_to_long_name:
+                    self._ambiguous_acronyms.add(acronym)
+                else:
+                    self._acronym_to_long_name[acronym] = name
+
+        name_id = len(self.ground_truth_names)
+        self.ground_truth_names.append(name)
+        self._normalized_names.append(normalized)
+        name_trigrams = trigrams(normalized)
+        self._trigram_sets.append(name_trigrams)
+        for trigram in name_trigrams:
+            self._trigram_index[trigram].add(name_id)
+
+    def _match_acronym(self, name):
+        if not _ACRONYM_RE.match(name) or name in self._ambiguous_acronyms:
+            return None
+        return self._acronym_to_long_name.get(name)
+
+    def _match_fuzzy(self, normalized):
+        name_trigrams = trigrams(normalized)
+        shared_counts = defaultdict(int)
+        for trigram in name_trigrams:
+            for name_id in self._trigram_index.get(trigram, ()):
+                shared_counts[name_id] += 1
+
+        shortlist = []
+        for name_id, shared in shared_counts.items():
+            dice = 2 * shared / (len(name_trigrams) + len(self._trigram_sets[name_id]))
+            if dice >= FUZZY_SHORTLIST_THRESHOLD:
+                shortlist.append((dice, name_id))
+
+        scored = sorted(
+            (
+                (SequenceMatcher(None, normalized, self._normalized_names[name_id]).ratio(), name_id)
+                for _, name_id in heapq.nlargest(FUZZY_SHORTLIST_SIZE, shortlist)
+            ),
+            reverse=True,
+        )
+        if not scored:
+            return None
+        best_score, best_id = scored[0]
+        runner_up_score = scored[1][0] if len(scored) > 1 else 0.0
+        if best_score < FUZZY_MATCH_THRESHOLD or best_score - runner_up_score < FUZZY_MATCH_MARGIN:
+            return None
+        # Character similarity can't tell "North Carolina" from "South Carolina", so both names
+        # must also have the same significant words.
+        if significant_words(normalized) != significant_words(self._normalized_names[best_id]):
+            return None
+        return self.ground_truth_names[best_id]
+
+    def match_exact(self, name):
+        """
+        Returns the ground-truth spelling for name if it is the same up to case, punctuation
+        and whitespace, or None. Unlike match, this never guesses.
+        """
+        name = name.strip()
+        if not name:
+            return None
+        if name in self._exact:
+            return name
+        return self._normalized.get(normalize_name(name))
+
+    def match(self, name):
+        """
+        Returns the ground-truth spelling for name, or None if it can't be resolved locally.
+        """
+        ground_truth_name = self.match_exact(name)
+        if ground_truth_name is not None or not name.strip():
+            return ground_truth_name
+        name = name.strip()
+        return self._match_acronym(name) or self._match_fuzzy(normalize_name(name))
+
+    def resolve(self, names):
+        """
+        Splits names into those resolved locally and those that still need the LLM.
+
+        Returns:
+            tuple: (resolved, unresolved), where resolved maps each matched name to its
+                   ground-truth spelling and unresolved lists the remaining names in order.
+        """
+        resolved = {}
+        unresolved = []
+        for name in names:
+            ground_truth_name = self.match(name)
+            if ground_truth_name is None:
+                unresolved.append(name)
+            else:
+                resolved[name] = ground_truth_name
+        return resolved, unresolved
@@ -1,38 +1,165 @@
+import io
 import os
+import time
+import cache
+import instrumentation
 import utils
-from pdf_processor import extract_text_from_pdf
-from apply_regex import regex_college_names 
-from llm import llm_gemini
-from highlight import process_college_data_to_new_sheet
-from prompts import SYSTEM_PROMPT_FILTER
+from pdf_processor import PDF_PAGE_TIMEOUT, PDF_WORKERS, iter_pdf_pages
+from apply_regex import regex_college_names
+from llm_filter import filter_college_names
+from workbook_loader import load_workbook, source_size
+from name_index import NameIndex
+from scheduler import StageGraph
 
-def workflow(input_excel_path, input_pdf_path, output_excel_path="output.xlsx", column="A", start_row=3):
+# Stream the output workbook through openpyxl's write-only mode in every workflow run
+# (see highlight.process_college_data_to_new_sheet), e.g. for the app's job workers.
+WRITE_ONLY_OUTPUT = os.environ.get("COLLEGE_WRITE_ONLY_OUTPUT", "") in ("1", "true", "True")
+# Top-level stages recorded by workflow, in dependency order (used for progress reporting).
+WORKFLOW_STAGES = ("extract_candidates", "llm_filter", "excel_load", "ground_truth", "normalize", "highlight")
+
+def _timed_iterator(iterable, timing):
+    """Yields from iterable, adding the time spent producing items to timing["seconds"]."""
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            timing["seconds"] += time.perf_counter() - started
+            return
+        timing["seconds"] += time.perf_counter() - started
+        yield item
+
+def workflow(input_excel_path, input_pdf_path, output_excel_path="output.xlsx", column="A", start_row=3,
+             sheets=None, metrics=None, profile=instrumentation.PROFILE_MODE, pdf_workers=PDF_WORKERS,
+             page_timeout=PDF_PAGE_TIMEOUT, write_only=WRITE_ONLY_OUTPUT):
     """
     Main orchestration function to run the college list processing workflow.
+
+    Args:
+        input_excel_path: Path, raw bytes or binary file-like object of the spreadsheet.
+        input_pdf_path: Path, raw bytes or binary file-like object of the PDF.
+        output_excel_path: Path or writable binary file-like object for the output workbook.
+            If None, the workbook is built in memory and returned.
+        column: The column holding college names, or several of them (e.g. "A,C" or ["A", "C"]).
+        start_row (int): The row after which names start; the rows above it are copied as headers.
+        sheets: The sheets to process: None for the active sheet, "all", or a list of sheet titles.
+            Every selected sheet is read from the same load and gets its own output sheet.
+        metrics (instrumentation.RunMetrics, optional): Collects a JSON record per stage
+            (wall/CPU time, RSS growth, sizes, LLM tokens). A new one is used if omitted.
+        profile (str, optional): "cprofile" or "tracemalloc" to profile this run.
+        pdf_workers (int): Worker processes to extract PDF pages with; 1 extracts them serially.
+            Defaults to the COLLEGE_PDF_WORKERS environment variable.
+        page_timeout (float, optional): Seconds allowed per PDF page before it is skipped.
+            Defaults to the COLLEGE_PDF_PAGE_TIMEOUT environment variable.
+        write_only (bool): Stream the output workbook with openpyxl's write-only mode, which
+            keeps memory flat for large rosters; the file is the same. Defaults to the
+            COLLEGE_WRITE_ONLY_OUTPUT environment variable.
+
+    Returns:
+        bool: True if the output workbook was written successfully; or, when output_excel_path
+            is None, an io.BytesIO holding the workbook (None on failure).
     """
+    metrics = metrics or instrumentation.RunMetrics()
+    output_buffer = io.BytesIO() if output_excel_path is None else None
+    output_target = output_excel_path if output_buffer is None else output_buffer
+    with instrumentation.profiled(profile), metrics.activate():
+        success = _run_workflow(input_excel_path, input_pdf_path, output_target, column, start_row, sheets, metrics,
+                                pdf_workers, page_timeout, write_only)
+    if output_buffer is None:
+        return success
+    if not success:
+        return None
+    output_buffer.seek(0)
+    return output_buffer
+
+def _run_workflow(input_excel_path, input_pdf_path, output_excel_path, column, start_row, sheets, metrics,
+                  pdf_workers, page_timeout, write_only):
     print("--- Starting Orchestration Workflow ---")
-    # --- Extract text from PDF ---
-    pdf_text = extract_text_from_pdf(input_pdf_path)
-    
-    # --- Apply regex to extract potential college names ---
-    regex_results = regex_college_names(pdf_text)
-    
-    # --- Process regex results with LLM ---
-    llm_results = llm_gemini(user_prompt=regex_results, system_prompt=SYSTEM_PROMPT_FILTER)
-    
+
+    # --- Extract text from PDF and apply regex to extract potential college names ---
+    # Pages are streamed straight into the regex stage instead of materializing the full text.
+    def extract_candidates():
+        with metrics.stage("extract_candidates", pdf_bytes=source_size(input_pdf_path)) as stage:
+            pdf_timing = {"seconds": 0.0}
+            started = time.perf_counter()
+            pages = iter_pdf_pages(input_pdf_path, pdf_workers, page_timeout)
+            regex_results = regex_college_names(_timed_iterator(pages, pdf_timing))
+            stage["outputs"]["candidates"] = len(regex_results.splitlines())
+            stage["outputs"]["pdf_parse_seconds"] = round(pdf_timing["seconds"], 4)
+            stage["outputs"]["regex_seconds"] = round(time.perf_counter() - started - pdf_timing["seconds"], 4)
+        return regex_results
+
+    # --- Process regex results with LLM, in concurrent chunks ---
+    def llm_filter(extract_candidates):
+        with metrics.stage("llm_filter", candidates=len(extract_candidates.splitlines())) as stage:
+            started = time.perf_counter()
+            first_college = {}
+
+            def on_college(college):
+                first_college.setdefault("seconds", time.perf_counter() - started)
+
+            llm_results = filter_college_names(extract_candidates, on_college=on_college)
+            stage["outputs"]["response_chars"] = len(llm_results)
+            # Replies are streamed, so names are usable well before the slowest chunk returns.
+            if first_college:
+                stage["outputs"]["first_college_seconds"] = round(first_college["seconds"], 4)
+        return llm_results
+
+    # --- Load the input workbook once; both stages below read from it ---
+    def excel_load():
+        with metrics.stage("excel_load", excel_bytes=source_size(input_excel_path)) as stage:
+            input_workbook = load_workbook(input_excel_path)
+            stage["outputs"]["sheets"] = len(input_workbook.worksheets)
+        return input_workbook
+
+    # --- Index every name in the selected sheets and columns; highlight reuses the same index ---
+    def ground_truth(excel_load):
+        with metrics.stage("ground_truth", column=column, start_row=start_row, sheets=sheets) as stage:
+            name_index = NameIndex.build(excel_load, sheets, column, start_row)
+            stage["outputs"]["names"] = len(name_index)
+            stage["outputs"]["sheets"] = len(name_index.sheet_titles)
+        return name_index
+
     # --- Normalize LLM results with utils ---
-    ground_truth_college_names = utils.extract_column_data_as_string(input_excel_path, column, start_row)
-    normalized_college_names = utils.parse_college_names(ground_truth_college_names, llm_results)
-    
+    def normalize(ground_truth, llm_filter):
+        with metrics.stage("normalize", response_chars=len(llm_filter)) as stage:
+            normalized_college_names = utils.parse_college_names(ground_truth.ground_truth_text(), llm_filter)
+            stage["outputs"]["response_chars"] = len(normalized_college_names)
+        return normalized_college_names
+
     # --- Highlight results in Excel ---
-    process_college_data_to_new_sheet(input_excel_path, normalized_college_names, output_excel_path)
-    
+    def highlight(excel_load, ground_truth, normalize):
+        # highlight pulls in openpyxl, numpy and pandas, so it is imported when the stage runs
+        # rather than with this module (which the app and job workers import at startup).
+        from highlight import process_college_data_to_new_sheet
+        with metrics.stage("highlight") as stage:
+            success = process_college_data_to_new_sheet(excel_load, normalize, output_excel_path, write_only=write_only,
+                                                        name_index=ground_truth)
+            stage["outputs"]["success"] = success
+        return success
+
+    # The spreadsheet branch doesn't depend on the PDF or the first LLM call, so it runs
+    # alongside them; the PDF branch stays on this thread so per-page timeouts still work.
+    graph = (
+        StageGraph()
+        .add("extract_candidates", extract_candidates, main_thread=True)
+        .add("llm_filter", llm_filter, after=["extract_candidates"], main_thread=True)
+        .add("excel_load", excel_load)
+        .add("ground_truth", ground_truth, after=["excel_load"])
+        .add("normalize", normalize, after=["ground_truth", "llm_filter"])
+        .add("highlight", highlight, after=["excel_load", "ground_truth", "normalize"])
+    )
+    success = graph.run()["highlight"]
+
+    print(f"Cache stats: {cache.report()}")
     print("--- Orchestration Workflow Completed ---")
+    return success
 
 def main():
     print("Starting workflow...")
     workflow("../SAMPLE 2025 College Bound Interview Spreadsheet.xlsx", "../List of Chloe's Colleges for 2025 Interview Spreadsheet.pdf")
-    
+
 if __name__ == "__main__":
     main()
-    
\ No newline at end of file
+
@@ -1,15 +1,253 @@
-import pdfplumber
 import io
+import math
+import os
+import signal
+import threading
+import time
+import multiprocessing
+import cache
 
-def extract_text_from_pdf(pdf_file_source, save_to_file=False, output_filename="extracted_pdf_content.txt"):
+# --- Configuration ---
+# Defaults for workflow runs (orchestrator.workflow, and so the app, batch and job workers).
+PDF_WORKERS = int(os.environ.get("COLLEGE_PDF_WORKERS", 1))
+PDF_PAGE_TIMEOUT = float(os.environ.get("COLLEGE_PDF_PAGE_TIMEOUT", 0)) or None
+# Extra seconds granted to a whole shard on top of its per-page budget, to cover
+# opening the PDF in the worker process.
+SHARD_TIMEOUT_SLACK_SECONDS = 10
+
+
+class PageTimeoutError(Exception):
+    """Raised inside a worker when a single page exceeds its extraction budget."""
+
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeoutError()
+
+
+def _extract_page_text(page, page_timeout=None):
+    """
+    Extracts the text of a single pdfplumber page, optionally bounded by a timeout.
+
+    The timeout relies on SIGALRM, so it is only enforced on platforms that provide it
+    and when running on the main thread (as process-pool workers do).
+
+    Returns:
+        str or None: The page text, or None if the page timed out.
+    """
+    use_alarm = (
+        page_timeout
+        and hasattr(signal, "SIGALRM")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if not use_alarm:
+        return page.extract_text()
+
+    previous_handler = signal.signal(signal.SIGALRM, _raise_page_timeout)
+    signal.setitimer(signal.ITIMER_REAL, page_timeout)
+    try:
+        return page.extract_text()
+    except PageTimeoutError:
+        print(f"Warning: page {page.page_number} exceeded {page_timeout}s and was skipped.")
+        return None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _as_pdf_opener(pdf_file_source):
+    """Returns something pdfplumber.open accepts: a path, or a file-like object rewound to its start."""
+    if isinstance(pdf_file_source, bytes):
+        return io.BytesIO(pdf_file_source)
+    if hasattr(pdf_file_source, "seek"):
+        pdf_file_source.seek(0)
+    return pdf_file_source
+
+
+def _open_pdf(pdf_file_source):
+    """Opens a PDF path, raw bytes or file-like object with pdfplumber."""
+    # pdfplumber (and pdfminer under it) is slow to import, so it is only loaded once a PDF is read.
+    import pdfplumber
+    return pdfplumber.open(_as_pdf_opener(pdf_file_source))
+
+
+def _extract_page_range(pdf_file_source, start_page, end_page, page_timeout=None):
+    """
+    Worker entry point: opens the PDF independently and extracts pages [start_page, end_page).
+
+    Args:
+        pdf_file_source: A file path, or the raw PDF bytes.
+        start_page (int): 0-based index of the first page to extract.
+        end_page (int): 0-based index one past the last page to extract.
+        page_timeout (float, optional): Seconds allowed per page.
+
+    Returns:
+        list: The text of each page in the range (None for timed-out pages).
+    """
+    page_texts = []
+    with _open_pdf(pdf_file_source) as pdf:
+        for page_index in range(start_page, end_page):
+            page_texts.append(_extract_page_text(pdf.pages[page_index], page_timeout))
+    return page_texts
+
+
+def _iter_pages_parallel(pdf_file_source, max_workers, page_timeout=None):
+    """
+    Splits the PDF's pages into contiguous shards and extracts them across a process pool.
+
+    If a shard misses its deadline, or the caller stops early, the pool's workers are
+    terminated rather than waited for, so a worker stuck inside a pathological page
+    doesn't keep running (or hold up interpreter exit).
+
+    Yields:
+        str or None: The text of every page (None if skipped), in page order, as soon as
+                     its shard is done.
+    """
+    # Workers cannot share an open file handle, so uploads are passed as raw bytes; paths
+    # and bytes already pickle cleanly.
+    if isinstance(pdf_file_source, os.PathLike):
+        pdf_file_source = os.fspath(pdf_file_source)
+    elif hasattr(pdf_file_source, "read"):
+        if hasattr(pdf_file_source, "seek"):
+            pdf_file_source.seek(0)
+        pdf_file_source = pdf_file_source.read()
+
+    with _open_pdf(pdf_file_source) as pdf:
+        num_pages = len(pdf.pages)
+    if num_pages == 0:
+        return
+
+    pages_per_shard = math.ceil(num_pages / max_workers)
+    shards = [(start, min(start + pages_per_shard, num_pages)) for start in range(0, num_pages, pages_per_shard)]
+
+    # Spawned, not forked: the workflow extracts pages while other stages run on threads.
+    pool = multiprocessing.get_context("spawn").Pool(processes=min(max_workers, len(shards)))
+    finished = timed_out = False
+    try:
+        results = [
+            pool.apply_async(_extract_page_range, (pdf_file_source, start, end, page_timeout))
+            for start, end in shards
+        ]
+        for (start, end), result in zip(shards, results):
+            shard_timeout = None
+            if page_timeout:
+                shard_timeout = page_timeout * (end - start) + SHARD_TIMEOUT_SLACK_SECONDS
+            try:
+                yield from result.get(timeout=shard_timeout)
+            except multiprocessing.TimeoutError:
+                print(f"Warning: pages {start + 1}-{end} did not finish in time and were skipped.")
+                timed_out = True
+                yield from [None] * (end - start)
+        finished = True
+    finally:
+        # Don't wait on a worker stuck inside a pathological page: kill it.
+        if finished and not timed_out:
+            pool.close()
+        else:
+            pool.terminate()
+        pool.join()
+
+
+def _iter_page_texts(pdf_file_source, max_workers=1, page_timeout=None):
+    """Yields the text of each page in order, serially or across a process pool."""
+    if max_workers and max_workers > 1:
+        yield from _iter_pages_parallel(pdf_file_source, max_workers, page_timeout)
+        return
+
+    with _open_pdf(pdf_file_source) as pdf:
+        for page in pdf.pages:
+            yield _extract_page_text(page, page_timeout)
+            # Drop the page's parsed layout objects so memory stays flat on long documents.
+            page.close()
+
+
+def _iter_page_texts_cached(pdf_file_source, max_workers=1, page_timeout=None, use_cache=True):
+    """
+    Same as _iter_page_texts, but serves pages from the on-disk text cache when the
+    PDF's bytes have been seen before, and populates it after a complete extraction.
+    """
+    if not use_cache or not cache.pdf_text_cache.enabled:
+        yield from _iter_page_texts(pdf_file_source, max_workers, page_timeout)
+        return
+
+    try:
+        cache_key = cache.file_content_hash(pdf_file_source)
+    except Exception as e:
+        # The cache is an optimization: without a key, extract the PDF as if it were disabled.
+        print(f"Warning: could not hash the PDF for the text cache ({e}); extracting it uncached.")
+        yield from _iter_page_texts(pdf_file_source, max_workers, page_timeout)
+        return
+    cached_pages = cache.pdf_text_cache.get(cache_key)
+    if cached_pages is not None:
+        yield from cached_pages
+        return
+
+    page_texts = []
+    extraction_seconds = 0.0
+    page_iterator = _iter_page_texts(pdf_file_source, max_workers, page_timeout)
+    exhausted = object()
+    while True:
+        # Only time the extraction itself, not whatever the consumer does between pages.
+        started = time.perf_counter()
+        page_text = next(page_iterator, exhausted)
+        extraction_seconds += time.perf_counter() - started
+        if page_text is exhausted:
+            break
+        page_texts.append(page_text)
+        yield page_text
+
+    # Pages skipped after a timeout would make the cached text incomplete.
+    if None not in page_texts:
+        cache.pdf_text_cache.set(cache_key, page_texts, cost_seconds=extraction_seconds)
+
+
+def iter_pdf_pages(pdf_file_source, max_workers=1, page_timeout=None, use_cache=True):
+    """
+    Lazily extracts text from a PDF, one page at a time.
+
+    Args:
+        pdf_file_source: The file path to the PDF, its raw bytes, or a binary file-like
+                         object (e.g. a Streamlit upload or io.BytesIO), read from the start.
+        max_workers (int): Number of worker processes to extract pages with (see extract_text_from_pdf).
+        page_timeout (float, optional): Seconds allowed per page before it is skipped.
+        use_cache (bool): If True, reuse text previously extracted from a PDF with identical bytes.
+
+    Yields:
+        str: The text of each page that produced any text, in page order.
+             Stops early (after printing the error) if extraction fails.
+    """
+    try:
+        for page_text in _iter_page_texts_cached(pdf_file_source, max_workers, page_timeout, use_cache):
+            if page_text:
+                yield page_text
+    except Exception as e:
+        print(f"Error processing PDF: {e}")
+
+
+def iter_pdf_lines(pdf_file_source, max_workers=1, page_timeout=None, use_cache=True):
+    """
+    Lazily extracts text from a PDF, one line at a time.
+
+    Yields:
+        str: Each line of text, in document order.
+    """
+    for page_text in iter_pdf_pages(pdf_file_source, max_workers, page_timeout, use_cache):
+        yield from page_text.splitlines()
+
+
+def extract_text_from_pdf(pdf_file_source, save_to_file=False, output_filename="extracted_pdf_content.txt",
+                          max_workers=1, page_timeout=None, use_cache=True):
     """
     Extracts raw text content from a PDF file.
 
     Args:
-        pdf_file_source: Either a string representing the file path to the PDF,
-                         or a file-like object (bytes) from a file upload.
+        pdf_file_source: The file path to the PDF, its raw bytes, or a binary file-like
+                         object (e.g. a Streamlit upload or io.BytesIO), read from the start.
         save_to_file (bool): If True, saves the extracted text to a local file.
         output_filename (str): The name of the file to save the text to if save_to_file is True.
+        max_workers (int): Number of worker processes to extract pages with. With 1 (the default),
+                           pages are extracted serially in the current process.
+        page_timeout (float, optional): Seconds allowed per page before it is skipped.
+        use_cache (bool): If True, reuse text previously extracted from a PDF with identical bytes.
 
     Returns:
         str: A single string containing all extracted text from the PDF.
@@ -18,13 +256,10 @@ def extract_text_from_pdf(pdf_file_source, save_to_file=False, output_filename="
     all_text_list = []
     extracted_text = ""
     try:
-        # pdfplumber.open can handle both file paths and file-like objects
-        with pdfplumber.open(pdf_file_source) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text: # Ensure text was extracted
-                    all_text_list.append(page_text)
-        
+        for page_text in _iter_page_texts_cached(pdf_file_source, max_workers, page_timeout, use_cache):
+            if page_text: # Ensure text was extracted
+                all_text_list.append(page_text)
+
         extracted_text = "\n".join(all_text_list)
 
         if save_to_file:
@@ -39,4 +274,4 @@ def extract_text_from_pdf(pdf_file_source, save_to_file=False, output_filename="
         print(f"Error processing PDF: {e}")
         return ""
 
-    return extracted_text
\ No newline at end of file
+    return extracted_text
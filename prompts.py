@@ -21,12 +21,28 @@ I will give you a groud truth college list and a college list in JSON which you
 
 For example, if there is a college name in the ground truth list called "MIT", and there is a college name in the JSON list called "Massachusetts Institute of Technology", change that name in JSON list to "MIT".
 
+Also list every name you changed under "renamed", mapping the original name in the JSON list to the ground truth name you replaced it with. Leave "renamed" empty if you changed nothing.
+
 Return the result in JSON format:
 
 <JSON format>
 {
     colleges: [
     ...
-    ]
+    ],
+    renamed: {
+    "...": "...",
+    }
+}
+"""
+
+# Structured-output schema for SYSTEM_PROMPT_FILTER replies, in Gemini's OpenAPI subset.
+# SYSTEM_PROMPT_LIST_PROCESSING's "renamed" map has free-form keys, which the subset can't
+# describe, so that prompt only asks for JSON output without a schema.
+COLLEGES_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "colleges": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+    "required": ["colleges"],
 }
-"""
\ No newline at end of file
@@ -0,0 +1,123 @@
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# --- Configuration ---
+DEFAULT_MAX_WORKERS = 4
+
+
+class Stage:
+    """
+    One unit of work in a StageGraph.
+
+    Args:
+        name (str): Unique stage name; other stages refer to it in their `after` list.
+        function (callable): Called with the results of the `after` stages as keyword
+                             arguments (named after those stages).
+        after (iterable): Names of the stages whose results this stage needs.
+        main_thread (bool): Run on the thread that called StageGraph.run instead of in the
+                            pool, e.g. for work that relies on signal-based timeouts.
+    """
+    __slots__ = ("name", "function", "after", "main_thread")
+
+    def __init__(self, name, function, after=(), main_thread=False):
+        self.name = name
+        self.function = function
+        self.after = tuple(after)
+        self.main_thread = main_thread
+
+
+class StageGraph:
+    """
+    Runs stages as soon as the stages they depend on have finished.
+
+    Independent stages run concurrently on a thread pool, so the total time approaches
+    the longest dependency chain rather than the sum of all stages. Every stage runs in a
+    copy of the context of the thread that called run(), taken when the stage is started,
+    so context variables (e.g. the active RunMetrics) carry over to the pool threads.
+    """
+
+    def __init__(self):
+        self._stages = {}
+
+    def add(self, name, function, after=(), main_thread=False):
+        """Adds a stage and returns self, so calls can be chained."""
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' is already defined.")
+        self._stages[name] = Stage(name, function, after, main_thread)
+        return self
+
+    def _check(self):
+        for stage in self._stages.values():
+            unknown = [dependency for dependency in stage.after if dependency not in self._stages]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on undefined stage(s): {', '.join(unknown)}.")
+
+        # Kahn's algorithm: anything left over is part of a cycle.
+        remaining = {name: set(stage.after) for name, stage in self._stages.items()}
+        ready = [name for name, dependencies in remaining.items() if not dependencies]
+        while ready:
+            finished = ready.pop()
+            del remaining[finished]
+            for name, dependencies in remaining.items():
+                if finished in dependencies:
+                    dependencies.discard(finished)
+                    if not dependencies:
+                        ready.append(name)
+        if remaining:
+            raise ValueError(f"Stages form a dependency cycle: {', '.join(sorted(remaining))}.")
+
+    @staticmethod
+    def _call(stage, results, context):
+        kwargs = {dependency: results[dependency] for dependency in stage.after}
+        return context.run(stage.function, **kwargs)
+
+    def run(self, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Runs every stage and returns {stage name: result}.
+
+        If a stage raises, no further stages are started, the ones already running are
+        allowed to finish, and the first exception is re-raised.
+        """
+        self._check()
+        results = {}
+        pending = dict(self._stages)
+        running = {}
+        error = None
+
+        def ready_stages():
+            return [stage for stage in pending.values() if all(dependency in results for dependency in stage.after)]
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as executor:
+            while (pending or running) and error is None:
+                ready = ready_stages()
+                for stage in ready:
+                    if not stage.main_thread:
+                        del pending[stage.name]
+                        # The context is copied here, on the calling thread; a pool thread has its own, empty one.
+                        running[executor.submit(self._call, stage, dict(results), contextvars.copy_context())] = stage.name
+
+                inline = next((stage for stage in ready if stage.main_thread), None)
+                if inline is not None:
+                    del pending[inline.name]
+                    try:
+                        results[inline.name] = self._call(inline, results, contextvars.copy_context())
+                    except Exception as e:
+                        error = e
+                    # Collect whatever finished meanwhile without blocking.
+                    done = [future for future in running if future.done()]
+                elif running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                else:
+                    break
+
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        error = error or e
+
+            if error is not None:
+                wait(running)
+                raise error
+        return results
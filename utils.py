@@ -1,7 +1,9 @@
-import pandas as pd
 from prompts import SYSTEM_PROMPT_LIST_PROCESSING
 import llm
 import json
+from name_matcher import NameMatcher
+from alias_store import get_alias_store
+from workbook_loader import as_excel_opener, is_workbook
 
 def _col_letter_to_index(letter_col):
     """
@@ -28,39 +30,123 @@ def _col_letter_to_index(letter_col):
         raise ValueError("Column letter evaluated to an invalid index (0 before 0-indexing).")
     return index - 1 # Return 0-indexed (A=0, B=1, ...)
 
+def column_indexes(columns):
+    """
+    Converts one or more Excel columns to 1-based column indexes, in the order given.
+
+    Args:
+        columns: A column letter ('A'), a comma-separated string of letters ('A,C'), a 1-based
+                 column index, or a list of any of these.
+
+    Returns:
+        list: The distinct 1-based column indexes.
+
+    Raises:
+        ValueError: If no column is given or one of them is invalid.
+    """
+    if isinstance(columns, (str, int)):
+        columns = [columns]
+    indexes = []
+    for column in columns:
+        if isinstance(column, str):
+            new_indexes = [_col_letter_to_index(letter.strip()) + 1 for letter in column.split(",")]
+        elif isinstance(column, int) and not isinstance(column, bool) and column > 0:
+            new_indexes = [column]
+        else:
+            raise ValueError(f"Invalid column '{column}': expected a column letter or a 1-based index.")
+        indexes.extend(index for index in new_indexes if index not in indexes)
+    if not indexes:
+        raise ValueError("At least one column must be given.")
+    return indexes
+
 
-def extract_column_data_as_string(excel_file_path, column_letter, row_to_start_after):
+def _iter_sheet_column(sheet, col_idx, row_to_start_after):
+    """
+    Yields one column of a sheet as strings. Empty cells inside the column become "nan", as
+    they did when the column was read with pd.read_excel; trailing empty cells are dropped.
+    """
+    pending_empty = 0
+    for (value,) in sheet.iter_rows(
+        min_row=row_to_start_after + 1, min_col=col_idx + 1, max_col=col_idx + 1, values_only=True
+    ):
+        if value is None:
+            # Held back until a later value shows the gap isn't the column's trailing end.
+            pending_empty += 1
+            continue
+        for _ in range(pending_empty):
+            yield "nan"
+        pending_empty = 0
+        yield str(value)
+
+def _iter_column_values_from_file(excel_source, col_idx, row_to_start_after):
+    import openpyxl # Deferred so that importing this module stays cheap.
+    # Read-only mode parses the sheet XML row by row instead of building every cell up front.
+    workbook = openpyxl.load_workbook(as_excel_opener(excel_source), read_only=True, data_only=True)
+    try:
+        yield from _iter_sheet_column(workbook.worksheets[0], col_idx, row_to_start_after)
+    finally:
+        # Read-only workbooks keep the file open until closed.
+        workbook.close()
+
+def iter_column_values(excel_file_path, column_letter, row_to_start_after):
+    """
+    Streams the entries of one column of the first sheet, starting after a given row.
+
+    Unlike extract_column_data_as_string, nothing but the requested column is kept in memory,
+    and errors are raised rather than reported as an empty result.
+
+    Only a path, bytes or file-like source is streamed with openpyxl's read-only reader. A
+    loaded workbook is simply read column by column, so workflow, which loads the workbook in
+    full for highlighting and takes the ground truth from a NameIndex, doesn't benefit from it;
+    the streaming path is for callers that only need the names.
+
+    Args:
+        excel_file_path: The path to the Excel file, its raw bytes, a binary file-like object,
+                         or a workbook already loaded with workbook_loader.load_workbook.
+        column_letter (str): The column letter (e.g., 'A', 'B', 'AA'). Case-insensitive.
+        row_to_start_after (int): The 1-based row number *after which* to start extracting.
+
+    Returns:
+        generator: The column's entries as strings. A file is opened on the first next()
+                   and closed once the generator is exhausted or closed.
+
+    Raises:
+        ValueError: If the column letter or row_to_start_after is invalid.
+    """
+    if not isinstance(row_to_start_after, int) or row_to_start_after < 0:
+        raise ValueError("'row_to_start_after' must be a non-negative integer (0 or greater).")
+    col_idx = _col_letter_to_index(column_letter)
+    if is_workbook(excel_file_path):
+        return _iter_sheet_column(excel_file_path.worksheets[0], col_idx, row_to_start_after)
+    return _iter_column_values_from_file(excel_file_path, col_idx, row_to_start_after)
+
+def extract_column_data_as_string(excel_file_path, column_letter, row_to_start_after, as_generator=False):
     """
     Extracts entries from a specified column of an Excel file,
     starting after a specified row number, and returns them as a single
     newline-separated string.
 
     Args:
-        excel_file_path (str): The path to the Excel file.
+        excel_file_path: The path to the Excel file, its raw bytes, a binary file-like object,
+                         or a workbook already loaded with workbook_loader.load_workbook.
         column_letter (str): The column letter (e.g., 'A', 'B', 'AA'). Case-insensitive.
         row_to_start_after (int): The 1-based row number *after which* to start
                                   extracting. For example, if 3, extraction
                                   starts from row 4. If 0, extraction starts
                                   from row 1.
+        as_generator (bool): Return the entries one by one, as iter_column_values does,
+                             instead of joining them.
 
     Returns:
         str: A string containing the specified entries, each separated by
              a newline. Returns an empty string if no data is found under
-             the conditions, or if an error occurs.
+             the conditions, or if an error occurs. With as_generator, a
+             generator of the entries instead.
     """
+    if as_generator:
+        return iter_column_values(excel_file_path, column_letter, row_to_start_after)
     try:
-        if not isinstance(row_to_start_after, int) or row_to_start_after < 0:
-            raise ValueError("'row_to_start_after' must be a non-negative integer (0 or greater).")
-
-        col_idx = _col_letter_to_index(column_letter)
-        df = pd.read_excel(excel_file_path, usecols=[col_idx], header=None, engine='openpyxl')
-        slicing_start_index_0_based = row_to_start_after
-
-        if len(df) > slicing_start_index_0_based:
-            column_values = [str(item) for item in df.iloc[slicing_start_index_0_based:, 0].tolist()]
-            return "\n".join(column_values)
-        else:
-            return ""
+        return "\n".join(iter_column_values(excel_file_path, column_letter, row_to_start_after))
 
     except FileNotFoundError:
         print(f"Error: The file '{excel_file_path}' was not found.")
@@ -72,16 +158,8 @@ def extract_column_data_as_string(excel_file_path, column_letter, row_to_start_a
         print(f"An unexpected error occurred: {e}")
         return ""
     
-def parse_college_names(ground_truth_college_names, extracted_college_names):
-    """
-    Modifies same college with different names in extracted_college_names
-    to be the same college name in ground_truth_college_names.
-
-    Args:
-        ground_truth_college_names (str): A string containing newline-separated college names.
-        extracted_college_names (str): A string of a JSON object containing newline-separated college names.
-    """
-    
+def _llm_parse_college_names(ground_truth_college_names, extracted_college_names):
+    """Asks the LLM to rename JSON-list colleges onto their ground-truth spellings."""
     user_message = f"""
     <ground truth list>
     {ground_truth_college_names}
@@ -95,10 +173,127 @@ def parse_college_names(ground_truth_college_names, extracted_college_names):
     res = llm.llm_gemini(
         user_prompt=user_message,
         system_prompt=SYSTEM_PROMPT_LIST_PROCESSING,
-        temperature=0.0
+        temperature=0.0,
+        response_mime_type="application/json"
     )
     return res
 
+def _resolve_with_aliases(matcher, alias_store, names):
+    """
+    Resolves names through known aliases whose spelling appears in the ground truth.
+
+    Equivalents are only looked up exactly (up to case and punctuation): running the fuzzy
+    matcher on them would chain one guess onto another.
+
+    Returns:
+        tuple: (resolved, unresolved), as returned by NameMatcher.resolve.
+    """
+    resolved = {}
+    unresolved = []
+    for name in names:
+        ground_truth_name = None
+        for equivalent_name in alias_store.equivalents(name):
+            ground_truth_name = matcher.match_exact(equivalent_name)
+            if ground_truth_name:
+                break
+        if ground_truth_name:
+            resolved[name] = ground_truth_name
+        else:
+            unresolved.append(name)
+    return resolved, unresolved
+
+def map_college_names(ground_truth_college_names, extracted_colleges, use_llm_fallback=True, use_alias_store=True):
+    """
+    Normalizes a list of college names onto their ground-truth spellings (see parse_college_names).
+
+    Args:
+        ground_truth_college_names (str): A string containing newline-separated college names.
+        extracted_colleges (list): The college names to normalize.
+
+    Returns:
+        tuple: (mapping, normalized_colleges). mapping is {extracted name: normalized name, or
+               None if the LLM dropped it}; normalized_colleges is the de-duplicated list of
+               normalized names, which can also hold names the LLM returned that don't come
+               from any single extracted name.
+    """
+    matcher = NameMatcher(ground_truth_college_names.splitlines())
+    alias_store = get_alias_store() if use_alias_store else None
+    resolved, unresolved = matcher.resolve(extracted_colleges)
+    # Local matches aren't persisted: only imported and LLM-confirmed aliases are trusted
+    # enough to apply to every later run.
+    if alias_store is not None:
+        if unresolved:
+            alias_resolved, unresolved = _resolve_with_aliases(matcher, alias_store, unresolved)
+            resolved.update(alias_resolved)
+    print(f"Resolved {len(resolved)} college names locally, {len(unresolved)} left for the LLM.")
+
+    llm_colleges = unresolved
+    renamed = {}
+    if unresolved and use_llm_fallback:
+        res = _llm_parse_college_names(ground_truth_college_names, json.dumps({"colleges": unresolved}))
+        try:
+            llm_response = json.loads(res)
+            llm_colleges = llm_response.get("colleges", unresolved)
+            renamed = llm_response.get("renamed") or {}
+        except (json.JSONDecodeError, AttributeError):
+            print("Warning: could not decode the LLM's normalized names; keeping the unresolved names as-is.")
+        if not isinstance(renamed, dict):
+            renamed = {}
+        if alias_store is not None:
+            # Only keep renamings that map one of our names onto a real ground-truth name.
+            confirmed = {
+                original: ground_truth_name
+                for original, ground_truth_name in renamed.items()
+                if original in unresolved and matcher.match_exact(str(ground_truth_name)) == ground_truth_name
+            }
+            alias_store.add_many(confirmed, source="llm")
+
+    mapping = dict(resolved)
+    for name in unresolved:
+        if renamed.get(name) in llm_colleges:
+            mapping[name] = renamed[name]
+        else:
+            mapping[name] = name if name in llm_colleges else None
+
+    normalized_colleges = []
+    seen = set()
+    for college in [resolved[name] for name in extracted_colleges if name in resolved] + llm_colleges:
+        if college not in seen:
+            seen.add(college)
+            normalized_colleges.append(college)
+    return mapping, normalized_colleges
+
+def parse_college_names(ground_truth_college_names, extracted_college_names, use_llm_fallback=True,
+                        use_alias_store=True):
+    """
+    Modifies same college with different names in extracted_college_names
+    to be the same college name in ground_truth_college_names.
+
+    Names are first resolved locally with a NameMatcher (exact, casefold, acronym and
+    fuzzy matching), then through the persistent alias store. Only the names neither can
+    resolve are sent to the LLM, and every renaming it confirms is recorded in the store.
+
+    Args:
+        ground_truth_college_names (str): A string containing newline-separated college names.
+        extracted_college_names (str): A string of a JSON object containing newline-separated college names.
+        use_llm_fallback (bool): If False, unresolved names are kept as-is instead of
+                                 being sent to the LLM.
+        use_alias_store (bool): If False, the alias store is neither consulted nor updated.
+
+    Returns:
+        str: A JSON string of the form {"colleges": [...]}.
+    """
+    try:
+        extracted_colleges = json.loads(extracted_college_names).get("colleges", [])
+    except (json.JSONDecodeError, AttributeError):
+        print("Warning: could not decode the extracted college names; sending them to the LLM as-is.")
+        return _llm_parse_college_names(ground_truth_college_names, extracted_college_names)
+
+    _, normalized_colleges = map_college_names(
+        ground_truth_college_names, extracted_colleges, use_llm_fallback, use_alias_store
+    )
+    return json.dumps({"colleges": normalized_colleges})
+
 if __name__ == "__main__":
     print("--- Test Case for parse_college_names ---")
 
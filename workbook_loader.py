@@ -0,0 +1,56 @@
+import io
+import os
+import sys
+
+
+def is_workbook(excel_source):
+    """Returns True if excel_source is an already loaded openpyxl Workbook."""
+    # Nothing can be a Workbook before openpyxl is imported, so don't import it just to check.
+    if "openpyxl" not in sys.modules:
+        return False
+    from openpyxl.workbook.workbook import Workbook
+    return isinstance(excel_source, Workbook)
+
+
+def as_excel_opener(excel_source):
+    """Returns a path or a file-like object rewound to its start, for openpyxl or pandas to read."""
+    if isinstance(excel_source, bytes):
+        return io.BytesIO(excel_source)
+    if hasattr(excel_source, "seek"):
+        excel_source.seek(0)
+    return excel_source
+
+
+def source_label(source):
+    """Returns a short description of a file source for messages: its path, or what kind of buffer it is."""
+    if isinstance(source, str):
+        return source
+    return getattr(source, "name", None) or f"in-memory {type(source).__name__}"
+
+
+def source_size(source):
+    """Returns the size in bytes of a file path, raw bytes or in-memory buffer, if it can be determined."""
+    if isinstance(source, str):
+        return os.path.getsize(source) if os.path.exists(source) else None
+    if isinstance(source, bytes):
+        return len(source)
+    if hasattr(source, "getbuffer"):
+        return source.getbuffer().nbytes
+    return None
+
+
+def load_workbook(excel_source):
+    """
+    Loads an Excel workbook once so that every stage can share the same in-memory object.
+
+    Args:
+        excel_source: A file path, raw bytes, a binary file-like object (e.g. a Streamlit
+                      upload), or an already loaded Workbook (returned unchanged).
+
+    Returns:
+        openpyxl.Workbook: The loaded workbook, with styles and hyperlinks intact.
+    """
+    if is_workbook(excel_source):
+        return excel_source
+    import openpyxl # Deferred so that importing this module stays cheap.
+    return openpyxl.load_workbook(as_excel_opener(excel_source))